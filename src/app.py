@@ -8,23 +8,413 @@ A Streamlit application to:
 """
 
 import streamlit as st
-import pandas as pd
 import os
-import json
+import hashlib
+from collections import ChainMap
 from datetime import datetime
 from random import randint
-import requests
 
 from questions import (
     questions,
     get_question_by_id,
+    should_show_question,
+    update_hidden_questions,
+    resolve_item,
+    freeze_answers,
+    thaw_answers,
     collect_all_responsible_parties,
     collect_all_processors,
+    affects_party_lists,
 )
+from plan import compile_plan
 from session_manager import SessionManager
-from visualizer import DataFlowVisualizer
-from policy_generator import PolicyGenerator
-from translations import get_text, get_formatted_text, AVAILABLE_LANGUAGES
+from translations import (
+    get_text,
+    get_formatted_text,
+    get_text_bundle,
+    AVAILABLE_LANGUAGES,
+)
+
+
+# Instructions for the LLM that drafts the privacy policy from the summary table
+PROMPT_INSTRUCTIONS = """
+
+            Du bist ein Experte für schweizerische Gesetzgebung mit Schwerpunkt Datenschutzrecht. Auf Grundlage der nachfolgenden strukturierten Übersicht sollst du eine kohärente Datenschutzbestimmung in Fließtextform formulieren.
+
+            **Anforderungen an die Ausgabe:**
+
+            - Die Datenschutzbestimmung soll vollständig als zusammenhängender Fließtext erscheinen – **ohne Bulletpoints, Nummerierungen, Listen oder Tabellen**.
+            - Orientiere dich am **juristischen Stil** der schweizerischen Gesetzgebung: sachlich, klar, geschlechtsneutral, präzise.
+            - Nutze die nachstehende **strukturierte Gesetzesgliederung** als inhaltliche Orientierung. Die Titel sollen sinngemäß in den Text eingebaut werden – entweder als Überschriften oder eingebettet im Fließtext.
+            - Die Begriffe und Inhalte sollen wie bei echten Gesetzestexten in **Artikelstruktur** gegossen sein. Die Abschnitte innerhalb eines Kapitels (z. B. 3.1 und 3.2) dürfen als getrennte Artikel formuliert werden.
+            - Kein erklärender Text, keine Kommentare – nur der eigentliche Gesetzestext.
+
+            **Struktur für die Gesetzgebung (als Fließtext umzusetzen):**
+
+            | **Kapitel** | **Bezeichnung**                         |
+            | ----------- | --------------------------------------- |
+            | 1           | Begriffe, Grundsätze, Systeme           |
+            | 2           | Datenkatalog                            |
+            | 3           | Datenbearbeitungen, Profiling           |
+            | 3.1         | Abschnitt: Datenbearbeitung             |
+            | 3.2         | Abschnitt: Profiling                    |
+            | 4           | Zugriffsrechte                          |
+            | 5           | Datenbekanntgaben                       |
+            | 6           | Einschränkungen von Betroffenenrechten  |
+            | 7           | Aufbewahrung, Archivierung, Vernichtung |
+            | 7.1         | Abschnitt: Aufbewahrung                 |
+            | 7.2         | Abschnitt: Archivierung und Vernichtung |
+
+            Ergänze diesen Text so, dass er einer vollständigen Regelung für Organisationen in der Schweiz entspricht. Bitte verwende dafür den folgenden Datensatz:
+
+            ```
+            {dataset}
+            ```
+
+            Berücksichtige schweizerische Rechtsbegriffe, föderale Zuständigkeiten und formuliere geschlechtsneutral. Bitte verwende bold-underlined, italic for headers and sub headers of the document. carriage returns between headers / subheaders and text.
+            """
+
+# Structure the drafted privacy policy has to follow
+PROMPT_TEMPLATE = """
+
+Wer darf was warum/wozu bearbeiten ?
+
+Der Verantwortliche betreibt das System zum Zweck
+
+<SYSTEM>
+Der <VERANTWORTLICHE> betreibt (…) ein Informationssystem .
+Der <VERANTWORTLICHE> betreibt (…) ein System zur Vermittlung (…).
+
+Das <SYSTEM> dient:
+
+<VERANTWORTLICHE>
+
+<ZWECK>
+
+<BEISPIEL>
+	A betreibt für Zweck das System x.
+	B bearbeitet für Zweck die Datentypen y und z.
+</BEISPIEL>
+
+<BEISPIEL>
+A betreibt das System x für Zweck .
+B bearbeitet die Datentypen y und z für Zweck .
+</BEISPIEL>
+
+<BEISPIEL>
+A betreibt das System x zu Zweck 1 , Zweck 2 und Zweck 3 .
+B bearbeitet die Datentypen y und z zu Zweck 1 , Zweck 2 und Zweck 3 .
+</BEISPIEL>
+
+<BEISPIEL>
+A betreibt das System x zu:
+a.	 Zweck 1 ;
+b.	 Zweck 2 und
+c.	 Zweck 3 .
+B bearbeitet die Datentypen y und z:
+a.	 Zweck 1 ;
+b.	 Zweck 2 und
+c.	 Zweck 3 .
+</BEISPIEL>
+
+<BEISPIEL>
+…. zur Erfüllung seiner Aufgaben
+…. zur Erfüllung seiner Aufgaben nach diesem Gesetz
+…. zur Erfüllung seiner Aufgaben nach Artikeln xy
+</BEISPIEL>
+
+<BEISPIEL>
+Art. 15d	Lebendspende-Nachsorgeregister
+1 Jede Lebendspende-Nachsorgestelle führt ein Register für die Nachsorge der von ihr betreuten Spenderinnen und Spender.
+</BEISPIEL>
+
+<BEISPIEL>
+Art. 23a	Betrieb, Zweck und Verhältnis zur Heilmittelgesetzgebung
+
+1 Das BAG betreibt das Swiss Organ Allocation System (SOAS).
+
+2 Das SOAS dient:
+a.	zur Wahrnehmung der Aufgaben nach dem 4. Abschnitt;
+b.	zur Gewährleistung der Rückverfolgbarkeit der für die Spenden und Transplantationen relevanten Vorgänge;
+c.	der Aufsicht durch das BAG.
+</BEISPIEL>
+
+
+
+Der <VERANTWORTLICHE> betreibt das <SYSTEM> zum <ZWECK>
+
+<BEISPIEL>
+	Art. 118	Informationssystem
+	Das BAZG betreibt zur Erfüllung seiner Aufgaben ein Informationssystem.
+</BEISPIEL>
+
+<DATENTYP>
+<DATENART>
+<BEKANNTGABEFORM>
+<BEGRIFFE>
+
+<BEISPIEL>
+Art. X Begriffe
+1. <BEGRIFF>: <DEFINITION>
+</BEISPIEL>
+
+<GESETZESKONKURRENZEN>
+
+<BEISPIEL>
+Art x Verhältnis zu anderen Gesetzen
+Die Bestimmungen des anderes Gesetz sind auf welche Bereiche wie anwendbar.
+</BEISPIEL>
+
+<BEISPIEL>
+Art. 23a	Betrieb, Zweck und Verhältnis zur Heilmittelgesetzgebung
+3 Die Bestimmungen der Heilmittelgesetzgebung zu Medizinprodukten sind auf das SOAS nicht anwendbar.
+</BEISPIEL>
+
+<DATENART>
+
+Art xy
+Das Informationssystem des BAG umfasst die folgenden Datenarten
+<DATENART> : <DEFINITION>,
+<DATENART> : <DEFINITION>;
+<DATENART> : <DEFINITION>;
+
+<BEISPIEL>
+Art. 23b	Inhalt
+Das SOAS enthält folgende Daten:
+a.	Daten über die Identität und die Gesundheit sowie genetische Daten:
+1.	der Personen auf der Warteliste,
+2.	der spendenden und empfangenden Personen bei der Spende durch verstorbene Personen und bei der Lebendspende,
+3.	der am Überkreuz-Lebendspende-Programm nach dem 4b. Abschnitt teilnehmenden Personen;
+b.	Daten, die während des Zuteilungsverfahrens generiert werden.
+</BEISPIEL>
+
+
+<BEARBEITUNGEN>
+
+Der <BEARBEITENDE> bearbeitet zu diesen <ZWECKE> diese <DATENART>, welche datenschutzrechtlich diese <DATENTYP> umfassen.
+
+Art x  Datenbearbeitungen
+1  Der <BEARBEITENDE> bearbeitet
+a.	 Datenart 1 : Zu den Zwecken a, b und c Daten vom Typ
+ Datentyp 1 ,  Datentyp 2  und  Datentyp 3
+b.	 Datenart 2 : Zum Zweck e Daten vom Typ
+ Datentyp 4  und  Datentyp 5
+2 Der Bearbeitende 2 bearbeitet:
+a.	 Datenart 1 : Zum Zweck m Daten vom Typ …
+
+
+<BEISPIEL>
+Art. 23c	Datenbearbeitungen
+1 Die Transplantationszentren sind berechtigt, die nachstehenden im SOAS enthaltenen Daten zu bearbeiten:
+a.	Datenkategorien «Wartende», «Nicht-Überkreuz-Beteiligte» und «Überkreuz-Beteiligte» : Zur Betreuung, Erfüllung ihrer Aufgaben nach diesem Gesetz und zur gegenseitigen Kontrolle: Daten über die Identität und die Gesundheit sowie genetische Daten.
+b.	Datenkategorie «Zuteilungsdaten» : Zur Erfüllung ihrer Aufgaben nach diesem Gesetz und zur gegenseitigen Kontrolle: Daten über die Identität und die Gesundheit sowie genetische Daten.
+
+</BEISPIEL>
+Art. 118	Informationssystem
+Das BAZG betreibt zur Erfüllung seiner Aufgaben ein Informationssystem.
+
+Art 119
+
+Das Informationssystem des BAZG umfasst die folgenden Datenkategorien:
+o.	grenzüberschreitender Warenverkehr: Daten des grenzüberschreitenden Warenverkehrs zur Erhebung und Rückerstattung der Ein- und Ausfuhrabgaben (Art. 7 Abs. 2 Bst. a) und zum Vollzug nichtabgaberechtlicher Erlasse (Art. 7 Abs. 2 Bst. c);
+p.	Inlandabgaben: Daten betreffend die Inlandabgaben (Art. 7 Abs. 2 Bst. a);
+q.	Kontrollen: Daten der Kontrolle des Waren- und Personenverkehrs und der hierfür verwendeten Transportmittel (Art. 7 Abs. 2 Bst. b);
+r.	Unternehmensprüfung: Daten der Kontrollen im Rahmen von Unternehmensprüfungen (Art. 7 Abs. 2 Bst. a und b);
+s.	(…);
+t.	Administrativmassnahmen: Daten des Vollzugs von administrativen Massnahmen (Art. 73);
+u.	Strafverfolgung: Daten der Strafverfolgung (Art. 7 Abs. 2 Bst. f);
+v.	Vollzug von Strafen und Massnahmen: Daten des Vollzugs von Strafen und Massnahmen (Art. 7 Abs. 2 Bst. f);
+w.	Finanzen: Daten des Finanzmanagements des BAZG;
+x.	(…);
+y.	Risikoanalyse und Profiling: Daten der Risikoanalysen (Art. 131) sowie des Profilings und des Profilings mit hohem Risiko (Art. 133);
+z.	(…);
+aa.	administrative Tätigkeiten: Daten betreffend administrative Tätigkeiten des BAZG;
+bb.	kantonale polizeiliche Aufgaben: Daten betreffend die Erfüllung kantonaler polizeilicher Aufgaben durch das BAZG (Art. 10).
+
+<BEISPIEL>
+Art. 15d	Lebenspende-Nachsorgeregister
+
+4 Zur Bearbeitung der Daten berechtigt sind:
+a.	die Spenderinnen und Spender: bezüglich ihrer eigenen Daten.
+</BEISPIEL>
+
+
+
+<PROFILING>
+<MUSTER>
+1 <BEARBEITENDE> kann Risikoanalysen, Profilings und Profilings mit hohem Risiko nur durchführen, sofern dies notwendig ist für:
+a.	 <ZWECK> ;
+b.	 <ZWECK> ;
+c.	 <ZWECK> .
+</MUSTER>
+
+
+
+<BEISPIEL>
+Art. 117	Bearbeitung von Personendaten und Daten juristischer Personen
+1 Das BAG kann Personendaten, einschliesslich besonders schützenswerter Personendaten, und Daten von juristischen Personen, einschliesslich besonders schützenswerter Daten, nur bearbeiten, sofern dies notwendig ist für:
+a.	den Vollzug dieses Gesetzes;
+b.	den Vollzug der Abgabeerlasse;
+c.	den Vollzug der nichtabgaberechtlichen Erlasse; oder
+d.	die Erfüllung von Aufgaben, die ihm gestützt auf völkerrechtliche Verträge übertragen worden sind.
+
+2 Es kann Risikoanalysen, Profilings und Profilings mit hohem Risiko nur durchführen, sofern dies notwendig ist für:
+a.	den Vollzug dieses Gesetzes;
+b.	den Vollzug der Abgabeerlasse;
+c.	den Vollzug der nichtabgaberechtlichen Erlasse; oder
+d.	die Erfüllung von Aufgaben, die ihm gestützt auf völkerrechtliche Verträge übertragen worden sind.
+</BEISPIEL>
+
+
+<ZUGRIFFSRECHTE>
+
+<BEISPIEL>
+Art. 135	Zugriff durch Mitarbeiterinnen und Mitarbeiter des BAZG
+1 Die Mitarbeiterinnen und Mitarbeiter des BAZG haben nur auf die Daten im Informationssystem Zugriff, die zur Erfüllung ihrer Aufgaben erforderlich sind.
+2 Der Zugriff auf besonders schützenswerte Personendaten und besonders schützenswerte Daten von juristischen Personen ist in Anhang 1 Ziffer 1 geregelt.
+3 Der Bundesrat regelt die Zugriffsrechte in Bezug auf nicht besonders schützenswerte Personendaten und nicht besonders schützenswerte Daten von juristischen Personen.
+</BEISPIEL>
+
+
+<BEKANNTGABEN>
+<MUSTER>
+<BEKANNTGABENDE> gibt dem <EMPFÄNGER> diese <DATENARTEN> bekannt, welche datenschutzrechtlich diese <DATENTYPEN> umfassen. Die Bekanntgabe erfolgt in dieser <BEKANNTGABEFORM> zu diesen <ZWECKEN>.
+</MUSTER>
+
+
+<MUSTER>
+Art x  Bekanntgaben des <BEKANNTGABENDE> an  <EMPFÄNGER>
+
+1  Der <BEKANNTGABENDE> gibt den Mitarbeiterinnen und Mitarbeitern des  Empfängers 1  , die für xy zuständig sind, Daten in Bekanntgabeform bekannt.
+
+2  Die Bekanntgabe ist auf die nachstehenden Daten in den folgenden Datenkategorien beschränkt:
+a.	 <DATENART> : <DATENART> ,  <DATENTYP>  und  <DATENTYP> ;
+b.	 <DATENART> : <DATENTYP>  und  <DATENTYP> .
+
+3 Die Daten dürfen nur zu folgenden Zwecken bekanntgegeben werden:
+c.	 <ZWECK> ;
+d.	 <ZWECK> .
+</MUSTER>
+
+
+<MUSTER>
+2   Die Bekanntgabe ist beschränkt auf  Datenart 1   und  Datenart 2  , welche auch besonders schützenswerte Personendaten und besonders schützenswerter Daten von juristischen Personen umfassen können.
+</MUSTER>
+
+
+<BEISPIEL>
+Art. 137   Abrufverfahren für das fedpol
+
+1 Das BAZG gibt den Mitarbeiterinnen und Mitarbeitern des Bundesamts für Polizei (fedpol), die Aufgaben im Bereich der Bekämpfung der Kriminalität wahrnehmen, Daten im Informationssystem des BAZG im Abrufverfahren bekannt, insbesondere wenn es sich um Folgendes handelt:
+a.	Straftaten, die der Bundesgerichtsbarkeit unterstehen;
+b.	Geldwäscherei, einschliesslich der entsprechenden Vortaten, organisierte Kriminalität oder Terrorismusfinanzierung
+(…)
+Art. 139   Abrufverfahren für den NDB
+1 Das BAZG gibt den Mitarbeiterinnen und Mitarbeitern des Nachrichtendienstes des Bundes (NDB) mit folgenden Aufgaben Daten im Informationssystem des BAZG im Abrufverfahren bekannt:
+a.	Erfassung, Beschaffung und Auswertung relevanter Daten;
+b.	Identifikation von Personen.
+2 Der Abruf ist auf die nachstehenden Daten in den folgenden Datenkategorien beschränkt:
+</BEISPIEL>
+
+<BEISPIEL>
+5. Abschnitt: Bekanntgabe von nicht besonders schützenswerten Personendaten und nicht besonders schützenswerten Daten von juristischen Personen
+Art. 154
+Der Bundesrat regelt die Bekanntgabe von nicht besonders schützenswerten Personendaten und nicht besonders schützenswerten Daten von juristischen Personen.
+</BEISPIEL>
+
+
+<EINSCHRÄNKUNG_BETROFFENENRECHTE>
+
+<BEISPIEL>
+Art. 23c	Datenbearbeitung
+2 Personen, die an einem Zuteilungsprozess teilgenommen haben oder ein Organ gespendet oder empfangen haben, können keine Löschung ihrer Daten verlangen.
+</BEISPIEL>
+
+<BEISPIEL>
+Art. 23l	System für die Organzuteilung bei der Überkreuz-Lebendspende
+6 Personen, die an einem Programm teilnehmen, können keine Löschung ihrer Daten verlangen, sobald sie bei der Ermittlung der besten Kombinationen berücksichtigt worden sind.
+</BEISPIEL>
+
+<BEISPIEL>
+Art. 23o	Blut-Stammzellenregister
+…
+6 Eine im Register eingetragene Person kann nur die Löschung der sie betreffenden Daten verlangen, solange noch keine Tests für eine konkrete Spende durchgeführt wurden. Personen, die schon Blut-Stammzellen gespendet oder empfangen haben, können keine Löschung ihrer Daten verlangen.
+</BEISPIEL>
+
+<AUFBEWAHRUNG>
+
+
+<BEISPIEL>
+Art. x     Aufbewahrung
+
+Die im System y enthaltenen Personendaten, besonders schützenswerten Personendaten, Daten von juristischen Personen und besonders schützenswerten Daten von juristischen Personen, dürfen so lange aufbewahrt werden, wie es der Bearbeitungszweck erfordert
+</BEISPIEL>
+
+<BEISPIEL>
+1. Abschnitt:     Aufbewahrung
+Art 155     Grundsatz
+Die im Informationssystem des BAZG enthaltenen besonders schützenswerten Personendaten, besonders schützenswerten Daten von juristischen Personen, Daten, die auf einer Risikoanalyse beruhen, und Daten, die auf einem Profiling oder einem Profiling mit hohem Risiko beruhen, dürfen so lange aufbewahrt werden, wie es der Bearbeitungszweck erfordert, längstens aber bis zum Ablauf der Dauer nach den Artikeln 156−167.
+
+Art 160     Datenkategorie Vollzug von Strafen und Massnahmen
+Das BAZG darf besonders schützenswerte Personendaten und besonders schützenswerte Daten von juristischen Personen der Datenkategorie Vollzug von Strafen und Massnahmen nach Verfahrensabschluss höchstens 5 Jahre aufbewahren.
+
+Art 168     Nicht besonders schützenswerte Personendaten und nicht besonders schützenswerte Daten von juristischen Personen
+Der Bundesrat regelt die Aufbewahrungsdauer für die nicht besonders schützenswerten Personendaten und die nicht besonders schützenswerten Daten von juristischen Personen.
+</BEISPIEL>
+
+
+<ARCHIVIERUNG_UND_VERNICHTUNG>
+
+<BEISPIEL>
+2. Abschnitt:     Archivierung und Vernichtung
+Art. 169
+1 Die Archivierung von im Informationssystem des BAZG enthaltenen Daten richtet sich nach dem Archivierungsgesetz vom 26. Juni 1998.
+2 Personendaten, die das Bundesarchiv archiviert, sind vom BAZG zu vernichten. Bewertet das Bundesarchiv die angebotenen Daten als nicht archivwürdig, so ist Artikel 38 Absatz 2 des Datenschutzgesetzes vom 25. September 2020 (DSG) anwendbar.
+
+</BEISPIEL>
+
+<BEISPIEL>
+
+</BEISPIEL>
+
+<BEISPIEL>
+
+</BEISPIEL>
+
+<BEISPIEL>
+
+</BEISPIEL>
+
+<BEISPIEL>
+
+</BEISPIEL>
+
+<BEISPIEL>
+
+</BEISPIEL>
+
+<BEISPIEL>
+
+</BEISPIEL>
+
+<BEISPIEL>
+
+</BEISPIEL>
+
+
+
+"""
+
+POLICY_PROMPT = PROMPT_INSTRUCTIONS + "\n" + PROMPT_TEMPLATE
+
+# Language names for the sidebar selector, in each UI language
+LANGUAGE_LABELS = {
+    language: {
+        option: get_text(f"language_{option}", language)
+        for option in AVAILABLE_LANGUAGES
+    }
+    for language in AVAILABLE_LANGUAGES
+}
 
 
 # Initialize the app
@@ -35,65 +425,305 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-# Initialize session manager
-session_manager = SessionManager()
 
+@st.cache_resource
+def get_session_manager():
+    """Create the session manager once and share it across reruns"""
+    return SessionManager()
+
+
+# Initialize session manager and this session's state
+session_manager = get_session_manager()
+session_manager.initialize_session_state()
+
+
+@st.cache_resource
+def get_visualizer():
+    """Create the data flow visualizer once and share it across reruns"""
+    # Imported here so sessions that never reach the views don't pay for it
+    from visualizer import DataFlowVisualizer
+
+    return DataFlowVisualizer()
+
+
+@st.cache_resource(ttl=600)
+def load_api_token():
+    """Read the LLM API token from the .env file, rereading it every ten minutes"""
+    with open(".env", encoding="utf-8") as env_file:
+        return env_file.read().rstrip().partition("=")[2]
+
+
+def api_token_fingerprint():
+    """Hash the current API token, for cache keys that must not store the token"""
+    return hashlib.sha256(load_api_token().encode("utf-8")).hexdigest()
+
+
+@st.cache_resource
+def get_http_session():
+    """Create one HTTP session so LLM calls reuse the pooled connection"""
+    # Imported here, only the policy draft on the summary page needs it
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20))
+    return session
+
+
+@st.cache_resource
+def get_policy_generator():
+    """Create the policy generator once and share it across reruns"""
+    from policy_generator import PolicyGenerator
+
+    return PolicyGenerator()
+
+
+def format_question_text(question, item=None):
+    """Format question text by replacing {item} with the actual item"""
+    if item and question["_text_has_item"]:
+        return resolve_item(question["text"], item)
+    return question["text"]
+
+
+def format_answer(answer):
+    """Format an answer for display, joining list answers with commas"""
+    if isinstance(answer, list):
+        return ", ".join(map(str, answer))
+    return str(answer)
+
+
+def set_answer(question_id, value):
+    """
+    Store an answer and bump the answers version if the value changed
+
+    Args:
+        question_id (str): The ID of the answered question
+        value: The new answer
+    """
+    answers = st.session_state.answers
+    if question_id in answers and answers[question_id] == value:
+        return
+
+    answers[question_id] = value
+    st.session_state.answers_version += 1
+    if affects_party_lists(question_id):
+        st.session_state.party_lists_version += 1
+    update_hidden_questions(st.session_state.hidden_questions, answers, (question_id,))
+
+
+class AnswerBatch:
+    """
+    Collects the answer writes of a section and applies them in a single update.
+    Reads during the batch go through `answers`, which sees pending writes first.
+    """
+
+    def __enter__(self):
+        self._pending = {}
+        self.answers = ChainMap(self._pending, st.session_state.answers)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Flush even when a rerun interrupts the section, the values are valid
+        answers = st.session_state.answers
+        changed = {
+            key: value
+            for key, value in self._pending.items()
+            if key not in answers or answers[key] != value
+        }
+        if changed:
+            answers.update(changed)
+            st.session_state.answers_version += 1
+            if any(affects_party_lists(key) for key in changed):
+                st.session_state.party_lists_version += 1
+        return False
+
+    def set(self, question_id, value):
+        """Queue an answer to be written when the batch ends"""
+        if question_id in self.answers and self.answers[question_id] == value:
+            return
+
+        self._pending[question_id] = value
+        update_hidden_questions(
+            st.session_state.hidden_questions, self.answers, (question_id,)
+        )
+
+
+def collect_for_version(cache_name, collect):
+    """
+    Run a collect_* helper on the answers once per version of the party lists
+
+    The version only moves when an answer the helpers read changes, so edits
+    elsewhere in the questionnaire keep the cached result.
+
+    Args:
+        cache_name (str): The session state key holding the cached result
+        collect (callable): The helper, called with the answers
+
+    Returns:
+        list: The collected values
+    """
+    version = st.session_state.party_lists_version
+    cached = st.session_state.get(cache_name)
+    if cached is None or cached[0] != version:
+        cached = (version, collect(st.session_state.answers))
+        st.session_state[cache_name] = cached
+    return cached[1]
+
+
+def store_answer(question_id, value, batch=None):
+    """
+    Store an answer directly or queue it on a batch
+
+    Args:
+        question_id (str): The ID of the answered question
+        value: The new answer
+        batch (AnswerBatch, optional): The batch collecting the section's writes
+    """
+    if batch is None:
+        set_answer(question_id, value)
+    else:
+        batch.set(question_id, value)
+
+
+def store_text_input(question_id):
+    """
+    Widget callback that stores a text answer once the user commits the input
+
+    Args:
+        question_id (str): The ID of the answered question
+    """
+    user_input = st.session_state[f"input_{question_id}"]
+    if user_input:
+        set_answer(question_id, user_input)
+
+
+def set_answers(question_ids, value):
+    """
+    Button callback that sets several answers to the same value in one update
+
+    Args:
+        question_ids (list): The IDs of the answers to set
+        value: The new answer
+    """
+    with AnswerBatch() as batch:
+        for question_id in question_ids:
+            batch.set(question_id, value)
+
+
+def apply_matrix_edits(editor_name, keys, purposes, data_types):
+    """
+    Editor callback that writes the changed cells of a processor's matrix grid
 
-def format_question_text(text, item=None):
-    """Format question text by replacing {item} with the actual item"""
-    if item and "{item}" in text:
-        return text.replace("{item}", item)
-    return text
+    Args:
+        editor_name (str): The stable name of the grid's data editor
+        keys (dict): Answer key of each (purpose, data type) cell
+        purposes (list): The processing purposes, one grid column each
+        data_types (list): The data types, one grid row each
+    """
+    edited_rows = st.session_state[data_editor_key(editor_name)]["edited_rows"]
+    with AnswerBatch() as batch:
+        for row, changes in edited_rows.items():
+            data_type = data_types[int(row)]
+            for purpose, value in changes.items():
+                if purpose in purposes:
+                    batch.set(keys[purpose, data_type], bool(value))
+    renew_data_editor(editor_name)
 
 
-def should_show_question(question, answers):
+def data_editor_key(name):
     """
-    Determine if a question should be shown based on its conditions
+    Widget key of a data editor, renewed each time its own edits are applied
+
+    Writes to other answers keep the key, so they don't reset the editor.
 
     Args:
-        question (dict): The question to check
-        answers (dict): The current answers
+        name (str): Stable name of the editor
 
     Returns:
-        bool: True if the question should be shown, False otherwise
+        str: The editor's current widget key
     """
-    if "condition" not in question:
-        return True
+    return f"{name}_{st.session_state.editor_versions.get(name, 0)}"
 
-    condition = question["condition"]
-    q_id = condition["question_id"]
-    operator = condition["operator"]
-    value = condition["value"]
 
-    if q_id not in answers:
-        return False
+def renew_data_editor(name):
+    """Give a data editor a fresh key, so it is seeded from the answers again"""
+    versions = st.session_state.editor_versions
+    versions[name] = versions.get(name, 0) + 1
+
+
+def apply_list_edits(question_id, editor_name):
+    """
+    Editor callback that applies edited, deleted and added rows to a list answer
+
+    Args:
+        question_id (str): The ID of the list question
+        editor_name (str): The stable name of the list's data editor
+    """
+    edits = st.session_state[data_editor_key(editor_name)]
+    items = list(st.session_state.answers.get(question_id, []))
+
+    # Row positions in the edits refer to the list as it was rendered
+    for row, changes in edits["edited_rows"].items():
+        items[int(row)] = changes.get("entry", items[int(row)])
+    deleted = set(edits["deleted_rows"])
+    items = [value for row, value in enumerate(items) if row not in deleted]
+    items.extend(row.get("entry") for row in edits["added_rows"])
+
+    set_answer(
+        question_id, [value.strip() for value in items if value and value.strip()]
+    )
+    renew_data_editor(editor_name)
 
-    answer = answers[q_id]
 
-    if operator == "==":
-        return answer == value
-    elif operator == "!=":
-        return answer != value
-    elif operator == "in":
-        return answer in value if isinstance(value, list) else False
-    elif operator == "contains":
-        return value in answer if isinstance(answer, list) else answer == value
+def render_list_entries(question_id, heading, language):
+    """
+    Show the entries of a list answer in an editable table
+
+    Args:
+        question_id (str): The ID of the list question
+        heading (str): The heading shown above the entries
+        language (str): The UI language
+    """
+    import pandas as pd
 
-    return True
+    items = st.session_state.answers.get(question_id, [])
+    if not items:
+        return
+
+    st.write(heading)
+
+    # The callback renews the key after applying the edits, so the table is
+    # seeded from the answers again instead of replaying old edits
+    editor_name = f"editor_{question_id}"
+    st.data_editor(
+        pd.DataFrame({"entry": items}),
+        key=data_editor_key(editor_name),
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "entry": st.column_config.TextColumn(get_text("entry_column", language))
+        },
+        on_change=apply_list_edits,
+        args=(question_id, editor_name),
+    )
 
 
-def render_question(question, item=None):
+def render_question(question, item=None, batch=None, language=None):
     """
     Render a question based on its type
 
     Args:
         question (dict): The question to render
         item (str, optional): The item for a repeated question
+        batch (AnswerBatch, optional): Batch collecting the writes of a section
+        language (str, optional): The UI language, read from the session if omitted
 
     Returns:
         bool: True if the question has been answered, False otherwise
     """
-    language = st.session_state.get("language", "de")
+    if language is None:
+        language = st.session_state.get("language", "de")
 
     # Handle special question types
     if question["type"] == "special":
@@ -104,10 +734,10 @@ def render_question(question, item=None):
         return False
 
     question_id = question["id"]
-    if item and "{item}" in question_id:
-        question_id = question_id.replace("{item}", item)
+    if item and question["_id_has_item"]:
+        question_id = resolve_item(question_id, item)
 
-    question_text = format_question_text(question["text"], item)
+    question_text = format_question_text(question, item)
 
     # Show help text if available
     if "help" in question:
@@ -119,9 +749,10 @@ def render_question(question, item=None):
     if question["type"] == "text":
         # For lists, use a more interactive approach instead of comma-separated values
         if question.get("store_as_list", False):
-            # Initialize the list in session state if it doesn't exist
+            # Initialize the list through set_answer, so the versioned caches and the
+            # hidden questions see the new key
             if question_id not in st.session_state.answers:
-                st.session_state.answers[question_id] = []
+                set_answer(question_id, [])
 
             # maybe_default = question.get("default", [""])
             # if len(maybe_default) > 1 :
@@ -144,23 +775,15 @@ def render_question(question, item=None):
                 )
                 submitted = st.form_submit_button(get_text("add_button", language))
                 if submitted and new_item.strip():
-                    print(new_item)
-                    if question_id not in st.session_state.answers:
-                        st.session_state.answers[question_id] = []
-                    st.session_state.answers[question_id].append(new_item.strip())
-                    st.rerun()
+                    set_answer(
+                        question_id,
+                        st.session_state.answers[question_id] + [new_item.strip()],
+                    )
 
-            # Display the current list of items with delete buttons
-            if st.session_state.answers.get(question_id, []):
-                st.write(get_text("current_entries", language))
-                for i, item_value in enumerate(st.session_state.answers[question_id]):
-                    col1, col2 = st.columns([5, 1])
-                    with col1:
-                        st.text(item_value)
-                    with col2:
-                        if st.button("🗑️", key=f"delete_{question_id}_{i}"):
-                            st.session_state.answers[question_id].pop(i)
-                            st.rerun()
+            # Display the current list of items with a delete control
+            render_list_entries(
+                question_id, get_text("current_entries", language), language
+            )
         else:
             # Regular text input for non-list fields
             # maybe_default = question.get("default", [""])
@@ -172,11 +795,15 @@ def render_question(question, item=None):
             #     default_value = st.session_state.answers.get(question_id, "")
             default_value = st.session_state.answers.get(question_id, "")
 
+            # The answer is written by the callback when the input is committed
+            # (blur or Enter), not by every rerun that renders the widget
             if question.get("multiline", False):
-                user_input = st.text_area(
+                st.text_area(
                     get_text("your_answer", language),
                     value=default_value,
                     key=f"input_{question_id}",
+                    on_change=store_text_input,
+                    args=(question_id,),
                     height=150,
                     label_visibility="collapsed",
                     max_chars=question.get(
@@ -184,28 +811,23 @@ def render_question(question, item=None):
                     ),  # Add max_chars constraint
                 )
             else:
-                user_input = st.text_input(
+                st.text_input(
                     get_text("your_answer", language),
                     value=default_value,
                     key=f"input_{question_id}",
+                    on_change=store_text_input,
+                    args=(question_id,),
                     label_visibility="collapsed",
                     max_chars=question.get(
                         "max_length", 500
                     ),  # Add max_chars constraint
                 )
 
-            if user_input:
-                st.session_state.answers[question_id] = user_input
-
     elif question["type"] == "single_choice":
         options = question["options"]
-        default_idx = 0
-
-        if question_id in st.session_state.answers:
-            try:
-                default_idx = options.index(st.session_state.answers[question_id])
-            except ValueError:
-                default_idx = 0
+        default_idx = question["_option_index"].get(
+            st.session_state.answers.get(question_id), 0
+        )
 
         selected = st.radio(
             get_text("select_one", language),
@@ -215,25 +837,19 @@ def render_question(question, item=None):
             label_visibility="collapsed",
         )
 
-        st.session_state.answers[question_id] = selected
+        store_answer(question_id, selected, batch)
 
     elif question["type"] == "multiple_choice":
         options = question["options"]
+        options_set = question["_options_set"]
         default = []
 
         if question_id in st.session_state.answers:
-            if isinstance(st.session_state.answers[question_id], list):
-                default = [
-                    opt
-                    for opt in st.session_state.answers[question_id]
-                    if opt in options
-                ]
+            answer = st.session_state.answers[question_id]
+            if isinstance(answer, list):
+                default = [opt for opt in answer if opt in options_set]
             else:
-                default = (
-                    [st.session_state.answers[question_id]]
-                    if st.session_state.answers[question_id] in options
-                    else []
-                )
+                default = [answer] if answer in options_set else []
 
         selected = st.multiselect(
             get_text("select_all", language),
@@ -241,907 +857,626 @@ def render_question(question, item=None):
             default=default,
             key=f"multiselect_{question_id}",
             # label_visibility="collapsed",
-        )
-
-        # Always update the answer state for multiselect to fix the selection issue
-        st.session_state.answers[question_id] = selected
-
-    elif question["type"] == "number":
-        default_value = st.session_state.answers.get(question_id, 0)
-        user_input = st.number_input(
-            get_text("your_answer", language),
-            value=(
-                float(default_value) if isinstance(default_value, (int, float)) else 0
-            ),
-            key=f"number_{question_id}",
-            label_visibility="collapsed",
-        )
-
-        st.session_state.answers[question_id] = user_input
-
-    elif question["type"] == "toggle":
-        # Add handling for toggle type (yes/no)
-        default_value = question.get("default", False)
-        if question_id in st.session_state.answers:
-            default_value = st.session_state.answers[question_id]
-
-        selected = st.radio(
-            get_text("select_one", language),
-            ["Ja", "Nein"],
-            index=0 if default_value else 1,
-            key=f"toggle_{question_id}",
-            label_visibility="collapsed",
-        )
-
-        # Convert "Ja"/"Nein" to True/False
-        selected_value = selected == "Ja"
-        st.session_state.answers[question_id] = selected_value
-
-    # Return if the question has been answered and meets requirements
-    is_answered = question_id in st.session_state.answers
-
-    if question.get("required", False) and is_answered:
-        answer = st.session_state.answers[question_id]
-
-        if question["type"] == "multiple_choice":
-            is_answered = len(answer) > 0
-        elif question["type"] == "text":
-            is_answered = bool(answer)
-            if question.get("store_as_list", False):
-                is_answered = len(answer) > 0
-        elif question["type"] == "toggle":
-            # Toggle questions are always answered once rendered
-            is_answered = True
-
-    return is_answered
-
-
-def render_responsible_processors_question(question):
-    """
-    Render the special question for processors per responsible party
-
-    Args:
-        question (dict): The question configuration
-
-    Returns:
-        bool: True if all required sub-questions are answered, False otherwise
-    """
-    language = st.session_state.get("language", "de")
-
-    st.markdown(f"**{question['text']}**")
-    if "help" in question:
-        st.caption(question["help"])
-
-    # Collect all responsible parties from previous answers
-    responsible_parties = collect_all_responsible_parties(st.session_state.answers)
-
-    if not responsible_parties:
-        st.info(get_text("responsible_parties_first", language))
-        return False
-
-    all_answered = True
-
-    # Create a section for each responsible party using tabs
-    tabs = st.tabs(responsible_parties)
-
-    for i, party in enumerate(responsible_parties):
-        with tabs[i]:
-            st.markdown(
-                f"### {get_formatted_text('processor_for', language, party=party)}"
-            )
-
-            question_id = f"processors_{party}"
-
-            # Initialize the list in session state if it doesn't exist
-            if question_id not in st.session_state.answers:
-                st.session_state.answers[question_id] = []
-
-            # Create a form for adding new processors
-            with st.form(key=f"add_processor_form_{question_id}"):
-                new_processor = st.text_input(
-                    get_text("add_new_processor", language), key=f"input_{question_id}"
-                )
-                submitted = st.form_submit_button(get_text("add_button", language))
-                if submitted and new_processor.strip():
-                    if question_id not in st.session_state.answers:
-                        st.session_state.answers[question_id] = []
-                    st.session_state.answers[question_id].append(new_processor.strip())
-                    st.rerun()
-
-            # Display the current list of processors with delete buttons
-            if st.session_state.answers.get(question_id, []):
-                st.write(get_text("current_processors", language))
-                for j, processor in enumerate(st.session_state.answers[question_id]):
-                    col1, col2 = st.columns([5, 1])
-                    with col1:
-                        st.text(processor)
-                    with col2:
-                        if st.button("🗑️", key=f"delete_{question_id}_{j}"):
-                            st.session_state.answers[question_id].pop(j)
-                            st.rerun()
-
-            # Check if this party has at least one processor
-            is_answered = len(st.session_state.answers.get(question_id, [])) > 0
-            if not is_answered:
-                st.warning(get_text("min_one_processor", language))
-
-            all_answered = all_answered and is_answered
-
-    return all_answered
-
-
-def render_processor_matrix_question(question):
-    """
-    Render the matrix question for processors, purposes, and data types
-
-    Args:
-        question (dict): The question configuration
-
-    Returns:
-        bool: True if the matrix has been filled out, False otherwise
-    """
-    language = st.session_state.get("language", "de")
-
-    st.markdown(f"**{question['text']}**")
-    if "help" in question:
-        st.caption(question["help"])
-
-    # Collect processors, purposes, and data types
-    processors = collect_all_processors(st.session_state.answers)
-    purposes = st.session_state.answers.get("processing_purposes", [])
-    data_types = st.session_state.answers.get("data_types", [])
-
-    if not processors or not purposes or not data_types:
-        st.info(get_text("matrix_no_data", language))
-        return False
-
-    # Create matrix UI
-    st.markdown(f"### {get_text('processor_matrix_heading', language)}")
-
-    all_answered = True
-
-    # Create a tab for each processor
-    tabs = st.tabs(processors)
-    for i, processor in enumerate(processors):
-        with tabs[i]:
-            st.markdown(f"#### {processor}")
-
-            # Add an expander for each purpose to make it more compact
-            has_any_checked = False
-
-            for purpose in purposes:
-                with st.expander(f"{purpose}", expanded=False):
-                    # Create a grid of checkboxes for each data type
-                    # Use multiple columns for better layout
-                    num_columns = 2  # You can adjust this based on screen size
-                    rows = [
-                        data_types[j : j + num_columns]
-                        for j in range(0, len(data_types), num_columns)
-                    ]
-
-                    for row in rows:
-                        cols = st.columns(num_columns)
-                        for j, data_type in enumerate(row):
-                            with cols[j]:
-                                question_id = (
-                                    f"matrix_{processor}_{purpose}_{data_type}"
-                                )
-
-                                checked = st.checkbox(
-                                    f"{data_type}",
-                                    value=st.session_state.answers.get(
-                                        question_id, False
-                                    ),
-                                    key=f"checkbox_{question_id}",
-                                )
-
-                                # Update answer
-                                st.session_state.answers[question_id] = checked
-
-                                if checked:
-                                    has_any_checked = True
-
-            # Add quick selection buttons only if not hidden
-            if not question.get("hide_quick_selection", False):
-                st.markdown(f"#### {get_text('quick_selection', language)}")
-
-                # Create select all/none buttons for each purpose
-                purpose_cols = st.columns(len(purposes))
-                for j, purpose in enumerate(purposes):
-                    with purpose_cols[j]:
-                        if st.button(
-                            get_formatted_text(
-                                "select_all_for", language, purpose=purpose
-                            ),
-                            key=f"select_all_{processor}_{purpose}",
-                        ):
-                            for data_type in data_types:
-                                question_id = (
-                                    f"matrix_{processor}_{purpose}_{data_type}"
-                                )
-                                st.session_state.answers[question_id] = True
-                            st.rerun()
-
-                        if st.button(
-                            get_formatted_text(
-                                "select_none_for", language, purpose=purpose
-                            ),
-                            key=f"select_none_{processor}_{purpose}",
-                        ):
-                            for data_type in data_types:
-                                question_id = (
-                                    f"matrix_{processor}_{purpose}_{data_type}"
-                                )
-                                st.session_state.answers[question_id] = False
-                            st.rerun()
-
-            # Show current selections
-            st.markdown(f"#### {get_text('current_selection', language)}")
-            selections = []
-            for purpose in purposes:
-                for data_type in data_types:
-                    question_id = f"matrix_{processor}_{purpose}_{data_type}"
-                    if st.session_state.answers.get(question_id, False):
-                        selections.append(f"**{purpose}**: {data_type}")
-
-            if selections:
-                for selection in selections:
-                    st.markdown(f"- {selection}")
-            else:
-                st.info(get_text("no_selection", language))
-                all_answered = False
-
-    if not all_answered:
-        st.warning(get_text("min_one_selection", language))
-
-    return all_answered
-
-
-def render_repeated_section(section, answers):
-    """
-    Render a section of questions repeated for each item in a list
-
-    Args:
-        section (dict): The section configuration
-        answers (dict): The current answers
-
-    Returns:
-        bool: True if all required questions in the section are answered
-    """
-    language = st.session_state.get("language", "de")
-
-    repeat_for = section["repeat_for"]
-    items = answers.get(repeat_for, [])
-
-    if not items:
-        field_name = repeat_for.replace("_", " ")
-        st.info(get_formatted_text("answer_first", language, field=field_name))
-        return False
-
-    all_answered = True
-
-    for item in items:
-        st.markdown(get_formatted_text("details_for", language, item=item))
-        item = item.strip('"').strip("[").strip("]")
-        st.markdown(f"### Details for: **{item}**")
-        st.markdown("---")
-
-        for question in section["questions"]:
-            # Replace {item} in the question ID
-            question_id = (
-                question["id"].replace("{item}", item)
-                if "{item}" in question["id"]
-                else question["id"]
-            )
-
-            # Check if this specific instance of the question should be shown
-            modified_question = question.copy()
-            if "condition" in modified_question:
-                modified_question["condition"]["question_id"] = modified_question[
-                    "condition"
-                ]["question_id"].replace("{item}", item)
-
-            if should_show_question(modified_question, answers):
-                is_answered = render_question(question, item)
-                all_answered = all_answered and is_answered
-
-        st.markdown("---")
-
-    return all_answered
-
-
-def render_section(section, answers):
-    """
-    Render a section of questions
-
-    Args:
-        section (dict): The section configuration
-        answers (dict): The current answers
-
-    Returns:
-        bool: True if all required questions in the section are answered
-    """
-    all_answered = True
-
-    for question in section["questions"]:
-        if should_show_question(question, answers):
-            is_answered = render_question(question)
-            all_answered = all_answered and is_answered
-
-    return all_answered
-
-
-def render_summary(answers):
-    """
-    Render a summary of all answers
-
-    Args:
-        answers (dict): The current answers
-    """
-    language = st.session_state.get("language", "de")
-
-    st.header(get_text("summary_title", language))
-
-    # Prepare data for display
-    summary_data = []
-
-    # Process regular questions first
-    for question in questions:
-        if question["type"] not in ["section", "repeated_section", "special"]:
-            if question["id"] in answers:
-                answer = answers[question["id"]]
-
-                # Format the answer for display
-                if isinstance(answer, list):
-                    answer_display = ", ".join(str(a) for a in answer)
-                else:
-                    answer_display = str(answer)
-
-                summary_data.append(
-                    {"Frage": question["text"], "Antwort": answer_display}
-                )
-
-        # Process sections
-        elif question["type"] == "section":
-            if should_show_question(question, answers):
-                for sub_q in question["questions"]:
-                    if sub_q["id"] in answers:
-                        answer = answers[sub_q["id"]]
-
-                        # Format the answer for display
-                        if isinstance(answer, list):
-                            answer_display = ", ".join(str(a) for a in answer)
-                        else:
-                            answer_display = str(answer)
-
-                        summary_data.append(
-                            {"Frage": sub_q["text"], "Antwort": answer_display}
-                        )
+        )
 
-        # Process repeated sections
-        elif question["type"] == "repeated_section":
-            repeat_for = question["repeat_for"]
-            items = answers.get(repeat_for, [])
+        # Always update the answer state for multiselect to fix the selection issue
+        store_answer(question_id, selected, batch)
 
-            for item in items:
-                for sub_q in question["questions"]:
-                    question_id = sub_q["id"].replace("{item}", item)
+    elif question["type"] == "number":
+        num_ctor = question["_num_ctor"]
+        stored = st.session_state.answers.get(question_id, 0)
+        # Imported sessions may hold non-numeric values, fall back to zero
+        default_value = num_ctor(stored if isinstance(stored, (int, float)) else 0)
+        user_input = st.number_input(
+            get_text("your_answer", language),
+            value=default_value,
+            key=f"number_{question_id}",
+            label_visibility="collapsed",
+        )
 
-                    if question_id in answers:
-                        # Skip questions that shouldn't be shown based on conditions
-                        modified_question = sub_q.copy()
-                        if "condition" in modified_question:
-                            modified_question["condition"]["question_id"] = (
-                                modified_question["condition"]["question_id"].replace(
-                                    "{item}", item
-                                )
-                            )
-                            if not should_show_question(modified_question, answers):
-                                continue
-
-                        answer = answers[question_id]
-
-                        # Format the answer for display
-                        if isinstance(answer, list):
-                            answer_display = ", ".join(str(a) for a in answer)
-                        else:
-                            answer_display = str(answer)
-
-                        summary_data.append(
-                            {
-                                "Frage": f"{sub_q['text'].replace('{item}', item)} ({item})",
-                                "Antwort": answer_display,
-                            }
-                        )
+        store_answer(question_id, user_input, batch)
 
-        # Process special questions
-        elif question["type"] == "special":
-            if question["special_type"] == "responsible_processors":
-                responsible_parties = collect_all_responsible_parties(answers)
-                for party in responsible_parties:
-                    question_id = f"processors_{party}"
-                    if question_id in answers:
-                        processors = answers[question_id]
-                        if processors:
-                            answer_display = ", ".join(processors)
-                            summary_data.append(
-                                {
-                                    "Frage": get_formatted_text(
-                                        "processor_for", language, party=party
-                                    ),
-                                    "Antwort": answer_display,
-                                }
-                            )
+    elif question["type"] == "toggle":
+        # Add handling for toggle type (yes/no)
+        default_value = question.get("default", False)
+        if question_id in st.session_state.answers:
+            default_value = st.session_state.answers[question_id]
 
-            elif question["special_type"] == "processor_matrix":
-                processors = collect_all_processors(answers)
-                purposes = answers.get("processing_purposes", [])
-                data_types = answers.get("data_types", [])
+        selected = st.radio(
+            get_text("select_one", language),
+            ["Ja", "Nein"],
+            index=0 if default_value else 1,
+            key=f"toggle_{question_id}",
+            label_visibility="collapsed",
+        )
 
-                for processor in processors:
-                    matrix_entries = []
+        # Convert "Ja"/"Nein" to True/False
+        selected_value = selected == "Ja"
+        store_answer(question_id, selected_value, batch)
 
-                    for purpose in purposes:
-                        for data_type in data_types:
-                            question_id = f"matrix_{processor}_{purpose}_{data_type}"
-                            if answers.get(question_id, False):
-                                matrix_entries.append(f"{purpose} - {data_type}")
+    # Return if the question has been answered and meets requirements
+    answers = batch.answers if batch is not None else st.session_state.answers
+    is_answered = question_id in answers
 
-                    if matrix_entries:
-                        answer_display = "; ".join(matrix_entries)
-                        summary_data.append(
-                            {
-                                "Frage": get_formatted_text(
-                                    "purposes_datatypes_for",
-                                    language,
-                                    processor=processor,
-                                ),
-                                "Antwort": answer_display,
-                            }
-                        )
+    if question.get("required", False) and is_answered:
+        answer = answers[question_id]
 
-    # Display as a dataframe
-    if summary_data:
-        # Translate column headers based on language
-        if language == "en":
-            for item in summary_data:
-                item["Question"] = item.pop("Frage")
-                item["Answer"] = item.pop("Antwort")
+        if question["type"] == "multiple_choice":
+            is_answered = len(answer) > 0
+        elif question["type"] == "text":
+            is_answered = bool(answer)
+            if question.get("store_as_list", False):
+                is_answered = len(answer) > 0
+        elif question["type"] == "toggle":
+            # Toggle questions are always answered once rendered
+            is_answered = True
 
-        llm = True
-        df = pd.DataFrame(summary_data)
+    return is_answered
 
-        if llm:
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": "Bearer " + open(".env").read().rstrip().split("=")[1],
-            }
 
-            prompt = """
+def sync_answered_state(question_id, answered):
+    """
+    Remember whether a fragment question is answered and rerun the whole app when
+    that changes, since a fragment rerun doesn't redraw the navigation
 
-            Du bist ein Experte für schweizerische Gesetzgebung mit Schwerpunkt Datenschutzrecht. Auf Grundlage der nachfolgenden strukturierten Übersicht sollst du eine kohärente Datenschutzbestimmung in Fließtextform formulieren.
+    Args:
+        question_id (str): The ID of the question rendered in the fragment
+        answered (bool): Whether the question is answered now
 
-            **Anforderungen an die Ausgabe:**
+    Returns:
+        bool: The answered state, for the fragment to return
+    """
+    key = f"answered_{question_id}"
+    previous = st.session_state.get(key)
+    st.session_state[key] = answered
+    if previous is not None and previous != answered:
+        st.rerun()
+    return answered
 
-            - Die Datenschutzbestimmung soll vollständig als zusammenhängender Fließtext erscheinen – **ohne Bulletpoints, Nummerierungen, Listen oder Tabellen**.
-            - Orientiere dich am **juristischen Stil** der schweizerischen Gesetzgebung: sachlich, klar, geschlechtsneutral, präzise.
-            - Nutze die nachstehende **strukturierte Gesetzesgliederung** als inhaltliche Orientierung. Die Titel sollen sinngemäß in den Text eingebaut werden – entweder als Überschriften oder eingebettet im Fließtext.
-            - Die Begriffe und Inhalte sollen wie bei echten Gesetzestexten in **Artikelstruktur** gegossen sein. Die Abschnitte innerhalb eines Kapitels (z. B. 3.1 und 3.2) dürfen als getrennte Artikel formuliert werden.
-            - Kein erklärender Text, keine Kommentare – nur der eigentliche Gesetzestext.
 
-            **Struktur für die Gesetzgebung (als Fließtext umzusetzen):**
+@st.fragment
+def render_responsible_processors_question(question):
+    """
+    Render the special question for processors per responsible party
 
-            | **Kapitel** | **Bezeichnung**                         |
-            | ----------- | --------------------------------------- |
-            | 1           | Begriffe, Grundsätze, Systeme           |
-            | 2           | Datenkatalog                            |
-            | 3           | Datenbearbeitungen, Profiling           |
-            | 3.1         | Abschnitt: Datenbearbeitung             |
-            | 3.2         | Abschnitt: Profiling                    |
-            | 4           | Zugriffsrechte                          |
-            | 5           | Datenbekanntgaben                       |
-            | 6           | Einschränkungen von Betroffenenrechten  |
-            | 7           | Aufbewahrung, Archivierung, Vernichtung |
-            | 7.1         | Abschnitt: Aufbewahrung                 |
-            | 7.2         | Abschnitt: Archivierung und Vernichtung |
+    Args:
+        question (dict): The question configuration
 
-            Ergänze diesen Text so, dass er einer vollständigen Regelung für Organisationen in der Schweiz entspricht. Bitte verwende dafür den folgenden Datensatz:
+    Returns:
+        bool: True if all required sub-questions are answered, False otherwise
+    """
+    language = st.session_state.get("language", "de")
 
-            ```
-            {}
-            ```
+    st.markdown(f"**{question['text']}**")
+    if "help" in question:
+        st.caption(question["help"])
 
-            Berücksichtige schweizerische Rechtsbegriffe, föderale Zuständigkeiten und formuliere geschlechtsneutral. Bitte verwende bold-underlined, italic for headers and sub headers of the document. carriage returns between headers / subheaders and text.
-            """
+    # Collect all responsible parties from previous answers
+    responsible_parties = collect_for_version(
+        "responsible_parties_cache", collect_all_responsible_parties
+    )
 
-            prompt_template = """
+    if not responsible_parties:
+        st.info(get_text("responsible_parties_first", language))
+        return sync_answered_state(question["id"], False)
 
-Wer darf was warum/wozu bearbeiten ?
+    all_answered = True
 
-Der Verantwortliche betreibt das System zum Zweck
+    # Create a section for each responsible party using tabs
+    tabs = st.tabs(responsible_parties)
 
-<SYSTEM>
-Der <VERANTWORTLICHE> betreibt (…) ein Informationssystem .
-Der <VERANTWORTLICHE> betreibt (…) ein System zur Vermittlung (…).
+    for i, party in enumerate(responsible_parties):
+        with tabs[i]:
+            st.markdown(
+                f"### {get_formatted_text('processor_for', language, party=party)}"
+            )
 
-Das <SYSTEM> dient:
+            question_id = f"processors_{party}"
 
-<VERANTWORTLICHE>
+            # Initialize the list through set_answer, so the versioned caches and the
+            # hidden questions see the new key
+            if question_id not in st.session_state.answers:
+                set_answer(question_id, [])
 
-<ZWECK>
+            # Create a form for adding new processors
+            with st.form(key=f"add_processor_form_{question_id}"):
+                new_processor = st.text_input(
+                    get_text("add_new_processor", language), key=f"input_{question_id}"
+                )
+                submitted = st.form_submit_button(get_text("add_button", language))
+                if submitted and new_processor.strip():
+                    set_answer(
+                        question_id,
+                        st.session_state.answers[question_id]
+                        + [new_processor.strip()],
+                    )
 
-<BEISPIEL>
-	A betreibt für Zweck das System x.
-	B bearbeitet für Zweck die Datentypen y und z.
-</BEISPIEL>
+            # Display the current list of processors with a delete control
+            render_list_entries(
+                question_id, get_text("current_processors", language), language
+            )
 
-<BEISPIEL>
-A betreibt das System x für Zweck .
-B bearbeitet die Datentypen y und z für Zweck .
-</BEISPIEL>
+            # Check if this party has at least one processor
+            is_answered = len(st.session_state.answers.get(question_id, [])) > 0
+            if not is_answered:
+                st.warning(get_text("min_one_processor", language))
 
-<BEISPIEL>
-A betreibt das System x zu Zweck 1 , Zweck 2 und Zweck 3 .
-B bearbeitet die Datentypen y und z zu Zweck 1 , Zweck 2 und Zweck 3 .
-</BEISPIEL>
+            all_answered = all_answered and is_answered
 
-<BEISPIEL>
-A betreibt das System x zu:
-a.	 Zweck 1 ;
-b.	 Zweck 2 und
-c.	 Zweck 3 .
-B bearbeitet die Datentypen y und z:
-a.	 Zweck 1 ;
-b.	 Zweck 2 und
-c.	 Zweck 3 .
-</BEISPIEL>
+    return sync_answered_state(question["id"], all_answered)
 
-<BEISPIEL>
-…. zur Erfüllung seiner Aufgaben
-…. zur Erfüllung seiner Aufgaben nach diesem Gesetz
-…. zur Erfüllung seiner Aufgaben nach Artikeln xy
-</BEISPIEL>
 
-<BEISPIEL>
-Art. 15d	Lebendspende-Nachsorgeregister
-1 Jede Lebendspende-Nachsorgestelle führt ein Register für die Nachsorge der von ihr betreuten Spenderinnen und Spender.
-</BEISPIEL>
+@st.fragment
+def render_processor_matrix_tab(question, processor, purposes, data_types, language):
+    """
+    Render the matrix grid of one processor, edits only rerun this tab
 
-<BEISPIEL>
-Art. 23a	Betrieb, Zweck und Verhältnis zur Heilmittelgesetzgebung
+    Args:
+        question (dict): The question configuration
+        processor (str): The processor shown in the tab
+        purposes (list): The processing purposes, one grid column each
+        data_types (list): The data types, one grid row each
+        language (str): The UI language
 
-1 Das BAG betreibt das Swiss Organ Allocation System (SOAS).
+    Returns:
+        bool: True if at least one cell is selected for the processor
+    """
+    import pandas as pd
 
-2 Das SOAS dient:
-a.	zur Wahrnehmung der Aufgaben nach dem 4. Abschnitt;
-b.	zur Gewährleistung der Rückverfolgbarkeit der für die Spenden und Transplantationen relevanten Vorgänge;
-c.	der Aufsicht durch das BAG.
-</BEISPIEL>
+    st.markdown(f"#### {processor}")
 
+    # Build the processor's answer keys once, indexed by (purpose, data type)
+    keys = {
+        (purpose, data_type): f"matrix_{processor}_{purpose}_{data_type}"
+        for purpose in purposes
+        for data_type in data_types
+    }
 
+    # Read the processor's cells once, for the grid and the selection list
+    checked = {
+        cell: bool(st.session_state.answers.get(key, False))
+        for cell, key in keys.items()
+    }
 
-Der <VERANTWORTLICHE> betreibt das <SYSTEM> zum <ZWECK>
+    # One grid per processor, a row per data type and a column per purpose
+    matrix = pd.DataFrame(
+        [
+            [checked[purpose, data_type] for purpose in purposes]
+            for data_type in data_types
+        ],
+        index=data_types,
+        columns=purposes,
+    )
 
-<BEISPIEL>
-	Art. 118	Informationssystem
-	Das BAZG betreibt zur Erfüllung seiner Aufgaben ein Informationssystem.
-</BEISPIEL>
+    # The callback writes the changed cells and renews this grid's key, so the
+    # grid is seeded from the answers again. Edits in other tabs keep the key.
+    editor_name = f"matrix_editor_{processor}"
+    st.data_editor(
+        matrix,
+        key=data_editor_key(editor_name),
+        column_config={
+            purpose: st.column_config.CheckboxColumn(purpose) for purpose in purposes
+        },
+        use_container_width=True,
+        on_change=apply_matrix_edits,
+        args=(editor_name, keys, purposes, data_types),
+    )
 
-<DATENTYP>
-<DATENART>
-<BEKANNTGABEFORM>
-<BEGRIFFE>
+    # Add quick selection buttons only if not hidden
+    if not question.get("hide_quick_selection", False):
+        st.markdown(f"#### {get_text('quick_selection', language)}")
+
+        # Create select all/none buttons for each purpose
+        purpose_cols = st.columns(len(purposes))
+        for j, purpose in enumerate(purposes):
+            with purpose_cols[j]:
+                purpose_keys = [keys[purpose, data_type] for data_type in data_types]
+                st.button(
+                    get_formatted_text("select_all_for", language, purpose=purpose),
+                    key=f"select_all_{processor}_{purpose}",
+                    on_click=set_answers,
+                    args=(purpose_keys, True),
+                )
+                st.button(
+                    get_formatted_text("select_none_for", language, purpose=purpose),
+                    key=f"select_none_{processor}_{purpose}",
+                    on_click=set_answers,
+                    args=(purpose_keys, False),
+                )
 
-<BEISPIEL>
-Art. X Begriffe
-1. <BEGRIFF>: <DEFINITION>
-</BEISPIEL>
+    # Show current selections
+    st.markdown(f"#### {get_text('current_selection', language)}")
+    selections = [
+        f"**{purpose}**: {data_type}"
+        for (purpose, data_type), value in checked.items()
+        if value
+    ]
+
+    if selections:
+        for selection in selections:
+            st.markdown(f"- {selection}")
+    else:
+        st.info(get_text("no_selection", language))
 
-<GESETZESKONKURRENZEN>
+    return sync_answered_state(f"{question['id']}_{processor}", bool(selections))
 
-<BEISPIEL>
-Art x Verhältnis zu anderen Gesetzen
-Die Bestimmungen des anderes Gesetz sind auf welche Bereiche wie anwendbar.
-</BEISPIEL>
 
-<BEISPIEL>
-Art. 23a	Betrieb, Zweck und Verhältnis zur Heilmittelgesetzgebung
-3 Die Bestimmungen der Heilmittelgesetzgebung zu Medizinprodukten sind auf das SOAS nicht anwendbar.
-</BEISPIEL>
+def render_processor_matrix_question(question):
+    """
+    Render the matrix question for processors, purposes, and data types
 
-<DATENART>
+    Args:
+        question (dict): The question configuration
 
-Art xy
-Das Informationssystem des BAG umfasst die folgenden Datenarten
-<DATENART> : <DEFINITION>,
-<DATENART> : <DEFINITION>;
-<DATENART> : <DEFINITION>;
+    Returns:
+        bool: True if the matrix has been filled out, False otherwise
+    """
+    language = st.session_state.get("language", "de")
 
-<BEISPIEL>
-Art. 23b	Inhalt
-Das SOAS enthält folgende Daten:
-a.	Daten über die Identität und die Gesundheit sowie genetische Daten:
-1.	der Personen auf der Warteliste,
-2.	der spendenden und empfangenden Personen bei der Spende durch verstorbene Personen und bei der Lebendspende,
-3.	der am Überkreuz-Lebendspende-Programm nach dem 4b. Abschnitt teilnehmenden Personen;
-b.	Daten, die während des Zuteilungsverfahrens generiert werden.
-</BEISPIEL>
+    st.markdown(f"**{question['text']}**")
+    if "help" in question:
+        st.caption(question["help"])
 
+    # Collect processors, purposes, and data types
+    processors = collect_for_version("processors_cache", collect_all_processors)
+    purposes = st.session_state.answers.get("processing_purposes", [])
+    data_types = st.session_state.answers.get("data_types", [])
 
-<BEARBEITUNGEN>
+    if not processors or not purposes or not data_types:
+        st.info(get_text("matrix_no_data", language))
+        return False
 
-Der <BEARBEITENDE> bearbeitet zu diesen <ZWECKE> diese <DATENART>, welche datenschutzrechtlich diese <DATENTYP> umfassen.
+    # Create matrix UI
+    st.markdown(f"### {get_text('processor_matrix_heading', language)}")
 
-Art x  Datenbearbeitungen
-1  Der <BEARBEITENDE> bearbeitet
-a.	 Datenart 1 : Zu den Zwecken a, b und c Daten vom Typ
- Datentyp 1 ,  Datentyp 2  und  Datentyp 3
-b.	 Datenart 2 : Zum Zweck e Daten vom Typ
- Datentyp 4  und  Datentyp 5
-2 Der Bearbeitende 2 bearbeitet:
-a.	 Datenart 1 : Zum Zweck m Daten vom Typ …
+    all_answered = True
 
+    # Create a tab for each processor
+    tabs = st.tabs(processors)
+    for i, processor in enumerate(processors):
+        with tabs[i]:
+            is_answered = render_processor_matrix_tab(
+                question, processor, purposes, data_types, language
+            )
+            all_answered = all_answered and is_answered
 
-<BEISPIEL>
-Art. 23c	Datenbearbeitungen
-1 Die Transplantationszentren sind berechtigt, die nachstehenden im SOAS enthaltenen Daten zu bearbeiten:
-a.	Datenkategorien «Wartende», «Nicht-Überkreuz-Beteiligte» und «Überkreuz-Beteiligte» : Zur Betreuung, Erfüllung ihrer Aufgaben nach diesem Gesetz und zur gegenseitigen Kontrolle: Daten über die Identität und die Gesundheit sowie genetische Daten.
-b.	Datenkategorie «Zuteilungsdaten» : Zur Erfüllung ihrer Aufgaben nach diesem Gesetz und zur gegenseitigen Kontrolle: Daten über die Identität und die Gesundheit sowie genetische Daten.
+    if not all_answered:
+        st.warning(get_text("min_one_selection", language))
 
-</BEISPIEL>
-Art. 118	Informationssystem
-Das BAZG betreibt zur Erfüllung seiner Aufgaben ein Informationssystem.
+    return all_answered
 
-Art 119
 
-Das Informationssystem des BAZG umfasst die folgenden Datenkategorien:
-o.	grenzüberschreitender Warenverkehr: Daten des grenzüberschreitenden Warenverkehrs zur Erhebung und Rückerstattung der Ein- und Ausfuhrabgaben (Art. 7 Abs. 2 Bst. a) und zum Vollzug nichtabgaberechtlicher Erlasse (Art. 7 Abs. 2 Bst. c);
-p.	Inlandabgaben: Daten betreffend die Inlandabgaben (Art. 7 Abs. 2 Bst. a);
-q.	Kontrollen: Daten der Kontrolle des Waren- und Personenverkehrs und der hierfür verwendeten Transportmittel (Art. 7 Abs. 2 Bst. b);
-r.	Unternehmensprüfung: Daten der Kontrollen im Rahmen von Unternehmensprüfungen (Art. 7 Abs. 2 Bst. a und b);
-s.	(…);
-t.	Administrativmassnahmen: Daten des Vollzugs von administrativen Massnahmen (Art. 73);
-u.	Strafverfolgung: Daten der Strafverfolgung (Art. 7 Abs. 2 Bst. f);
-v.	Vollzug von Strafen und Massnahmen: Daten des Vollzugs von Strafen und Massnahmen (Art. 7 Abs. 2 Bst. f);
-w.	Finanzen: Daten des Finanzmanagements des BAZG;
-x.	(…);
-y.	Risikoanalyse und Profiling: Daten der Risikoanalysen (Art. 131) sowie des Profilings und des Profilings mit hohem Risiko (Art. 133);
-z.	(…);
-aa.	administrative Tätigkeiten: Daten betreffend administrative Tätigkeiten des BAZG;
-bb.	kantonale polizeiliche Aufgaben: Daten betreffend die Erfüllung kantonaler polizeilicher Aufgaben durch das BAZG (Art. 10).
+def render_repeated_section(section, answers, language=None):
+    """
+    Render a section of questions repeated for each item in a list
 
-<BEISPIEL>
-Art. 15d	Lebenspende-Nachsorgeregister
+    Args:
+        section (dict): The section configuration
+        answers (dict): The current answers
+        language (str, optional): The UI language, read from the session if omitted
 
-4 Zur Bearbeitung der Daten berechtigt sind:
-a.	die Spenderinnen und Spender: bezüglich ihrer eigenen Daten.
-</BEISPIEL>
+    Returns:
+        bool: True if all required questions in the section are answered
+    """
+    if language is None:
+        language = st.session_state.get("language", "de")
 
+    repeat_for = section["repeat_for"]
+    items = answers.get(repeat_for, [])
 
+    if not items:
+        field_name = repeat_for.replace("_", " ")
+        st.info(get_formatted_text("answer_first", language, field=field_name))
+        return False
 
-<PROFILING>
-<MUSTER>
-1 <BEARBEITENDE> kann Risikoanalysen, Profilings und Profilings mit hohem Risiko nur durchführen, sofern dies notwendig ist für:
-a.	 <ZWECK> ;
-b.	 <ZWECK> ;
-c.	 <ZWECK> .
-</MUSTER>
+    all_answered = True
 
+    with AnswerBatch() as batch:
+        for item in items:
+            st.markdown(get_formatted_text("details_for", language, item=item))
+            item = item.strip('"').strip("[").strip("]")
+            st.markdown(f"### Details for: **{item}**")
+            st.markdown("---")
 
+            for question in section["questions"]:
+                # Check if this specific instance of the question should be shown
+                if should_show_question(question, batch.answers, item):
+                    is_answered = render_question(question, item, batch, language)
+                    all_answered = all_answered and is_answered
 
-<BEISPIEL>
-Art. 117	Bearbeitung von Personendaten und Daten juristischer Personen
-1 Das BAG kann Personendaten, einschliesslich besonders schützenswerter Personendaten, und Daten von juristischen Personen, einschliesslich besonders schützenswerter Daten, nur bearbeiten, sofern dies notwendig ist für:
-a.	den Vollzug dieses Gesetzes;
-b.	den Vollzug der Abgabeerlasse;
-c.	den Vollzug der nichtabgaberechtlichen Erlasse; oder
-d.	die Erfüllung von Aufgaben, die ihm gestützt auf völkerrechtliche Verträge übertragen worden sind.
+            st.markdown("---")
 
-2 Es kann Risikoanalysen, Profilings und Profilings mit hohem Risiko nur durchführen, sofern dies notwendig ist für:
-a.	den Vollzug dieses Gesetzes;
-b.	den Vollzug der Abgabeerlasse;
-c.	den Vollzug der nichtabgaberechtlichen Erlasse; oder
-d.	die Erfüllung von Aufgaben, die ihm gestützt auf völkerrechtliche Verträge übertragen worden sind.
-</BEISPIEL>
+    return all_answered
 
 
-<ZUGRIFFSRECHTE>
+def render_section(section, answers, language=None):
+    """
+    Render a section of questions
 
-<BEISPIEL>
-Art. 135	Zugriff durch Mitarbeiterinnen und Mitarbeiter des BAZG
-1 Die Mitarbeiterinnen und Mitarbeiter des BAZG haben nur auf die Daten im Informationssystem Zugriff, die zur Erfüllung ihrer Aufgaben erforderlich sind.
-2 Der Zugriff auf besonders schützenswerte Personendaten und besonders schützenswerte Daten von juristischen Personen ist in Anhang 1 Ziffer 1 geregelt.
-3 Der Bundesrat regelt die Zugriffsrechte in Bezug auf nicht besonders schützenswerte Personendaten und nicht besonders schützenswerte Daten von juristischen Personen.
-</BEISPIEL>
+    Args:
+        section (dict): The section configuration
+        answers (dict): The current answers
+        language (str, optional): The UI language, read from the session if omitted
 
+    Returns:
+        bool: True if all required questions in the section are answered
+    """
+    all_answered = True
 
-<BEKANNTGABEN>
-<MUSTER>
-<BEKANNTGABENDE> gibt dem <EMPFÄNGER> diese <DATENARTEN> bekannt, welche datenschutzrechtlich diese <DATENTYPEN> umfassen. Die Bekanntgabe erfolgt in dieser <BEKANNTGABEFORM> zu diesen <ZWECKEN>.
-</MUSTER>
+    with AnswerBatch() as batch:
+        hidden = st.session_state.hidden_questions
+        for question in section["questions"]:
+            if question["id"] not in hidden:
+                is_answered = render_question(
+                    question, batch=batch, language=language
+                )
+                all_answered = all_answered and is_answered
 
+    return all_answered
 
-<MUSTER>
-Art x  Bekanntgaben des <BEKANNTGABENDE> an  <EMPFÄNGER>
 
-1  Der <BEKANNTGABENDE> gibt den Mitarbeiterinnen und Mitarbeitern des  Empfängers 1  , die für xy zuständig sind, Daten in Bekanntgabeform bekannt.
+# Renderers for top-level questions, keyed by type or ("special", special_type).
+# Each takes the question, the answers and the language.
+QUESTION_RENDERERS = {
+    "repeated_section": render_repeated_section,
+    "section": render_section,
+    ("special", "responsible_processors"): (
+        lambda question, answers, language: render_responsible_processors_question(
+            question
+        )
+    ),
+    ("special", "processor_matrix"): (
+        lambda question, answers, language: render_processor_matrix_question(question)
+    ),
+}
 
-2  Die Bekanntgabe ist auf die nachstehenden Daten in den folgenden Datenkategorien beschränkt:
-a.	 <DATENART> : <DATENART> ,  <DATENTYP>  und  <DATENTYP> ;
-b.	 <DATENART> : <DATENTYP>  und  <DATENTYP> .
 
-3 Die Daten dürfen nur zu folgenden Zwecken bekanntgegeben werden:
-c.	 <ZWECK> ;
-d.	 <ZWECK> .
-</MUSTER>
+def render_top_level_question(question, language):
+    """
+    Render a top-level question or section with its matching renderer
 
+    Args:
+        question (dict): The question configuration
+        language (str): The UI language
 
-<MUSTER>
-2   Die Bekanntgabe ist beschränkt auf  Datenart 1   und  Datenart 2  , welche auch besonders schützenswerte Personendaten und besonders schützenswerter Daten von juristischen Personen umfassen können.
-</MUSTER>
+    Returns:
+        bool: True if the question or section is fully answered
+    """
+    question_type = question["type"]
+    if question_type == "special":
+        renderer = QUESTION_RENDERERS.get((question_type, question.get("special_type")))
+        if renderer is None:
+            return False
+    else:
+        renderer = QUESTION_RENDERERS.get(question_type)
+        if renderer is None:
+            return render_question(question, language=language)
 
+    return renderer(question, st.session_state.answers, language)
 
-<BEISPIEL>
-Art. 137   Abrufverfahren für das fedpol
 
-1 Das BAZG gibt den Mitarbeiterinnen und Mitarbeitern des Bundesamts für Polizei (fedpol), die Aufgaben im Bereich der Bekämpfung der Kriminalität wahrnehmen, Daten im Informationssystem des BAZG im Abrufverfahren bekannt, insbesondere wenn es sich um Folgendes handelt:
-a.	Straftaten, die der Bundesgerichtsbarkeit unterstehen;
-b.	Geldwäscherei, einschliesslich der entsprechenden Vortaten, organisierte Kriminalität oder Terrorismusfinanzierung
-(…)
-Art. 139   Abrufverfahren für den NDB
-1 Das BAZG gibt den Mitarbeiterinnen und Mitarbeitern des Nachrichtendienstes des Bundes (NDB) mit folgenden Aufgaben Daten im Informationssystem des BAZG im Abrufverfahren bekannt:
-a.	Erfassung, Beschaffung und Auswertung relevanter Daten;
-b.	Identifikation von Personen.
-2 Der Abruf ist auf die nachstehenden Daten in den folgenden Datenkategorien beschränkt:
-</BEISPIEL>
+@st.cache_data(show_spinner=False)
+def build_summary_dataframe(answers_frozen, language):
+    """
+    Build the summary table of all answers
 
-<BEISPIEL>
-5. Abschnitt: Bekanntgabe von nicht besonders schützenswerten Personendaten und nicht besonders schützenswerten Daten von juristischen Personen
-Art. 154
-Der Bundesrat regelt die Bekanntgabe von nicht besonders schützenswerten Personendaten und nicht besonders schützenswerten Daten von juristischen Personen.
-</BEISPIEL>
+    Args:
+        answers_frozen (tuple): The current answers, as returned by freeze_answers
+        language (str): The language for question labels and column headers
 
+    Returns:
+        pd.DataFrame: One row per answered question, empty if nothing is answered
+    """
+    import pandas as pd
 
-<EINSCHRÄNKUNG_BETROFFENENRECHTE>
+    answers = thaw_answers(answers_frozen)
 
-<BEISPIEL>
-Art. 23c	Datenbearbeitung
-2 Personen, die an einem Zuteilungsprozess teilgenommen haben oder ein Organ gespendet oder empfangen haben, können keine Löschung ihrer Daten verlangen.
-</BEISPIEL>
+    # Collect the table column by column
+    question_column = []
+    answer_column = []
 
-<BEISPIEL>
-Art. 23l	System für die Organzuteilung bei der Überkreuz-Lebendspende
-6 Personen, die an einem Programm teilnehmen, können keine Löschung ihrer Daten verlangen, sobald sie bei der Ermittlung der besten Kombinationen berücksichtigt worden sind.
-</BEISPIEL>
+    # Walk the visible questions, with repeated sections already expanded
+    for planned in compile_plan(answers_frozen):
+        if planned.type == "special":
+            if planned.question["special_type"] == "responsible_processors":
+                responsible_parties = collect_all_responsible_parties(answers)
+                for party in responsible_parties:
+                    question_id = f"processors_{party}"
+                    if question_id in answers:
+                        processors = answers[question_id]
+                        if processors:
+                            question_column.append(
+                                get_formatted_text(
+                                    "processor_for", language, party=party
+                                )
+                            )
+                            answer_column.append(", ".join(processors))
 
-<BEISPIEL>
-Art. 23o	Blut-Stammzellenregister
-…
-6 Eine im Register eingetragene Person kann nur die Löschung der sie betreffenden Daten verlangen, solange noch keine Tests für eine konkrete Spende durchgeführt wurden. Personen, die schon Blut-Stammzellen gespendet oder empfangen haben, können keine Löschung ihrer Daten verlangen.
-</BEISPIEL>
+            elif planned.question["special_type"] == "processor_matrix":
+                processors = collect_all_processors(answers)
+                purposes = answers.get("processing_purposes", [])
+                data_types = answers.get("data_types", [])
 
-<AUFBEWAHRUNG>
+                # Scan the answers once for checked cells, so processors without
+                # any selection skip the purpose and data type grid entirely
+                selected = {
+                    key
+                    for key, value in answers.items()
+                    if value and key.startswith("matrix_")
+                }
 
+                for processor in processors:
+                    prefix = f"matrix_{processor}_"
+                    if not any(key.startswith(prefix) for key in selected):
+                        continue
+
+                    matrix_entries = [
+                        f"{purpose} - {data_type}"
+                        for purpose in purposes
+                        for data_type in data_types
+                        if f"{prefix}{purpose}_{data_type}" in selected
+                    ]
 
-<BEISPIEL>
-Art. x     Aufbewahrung
+                    if matrix_entries:
+                        question_column.append(
+                            get_formatted_text(
+                                "purposes_datatypes_for",
+                                language,
+                                processor=processor,
+                            )
+                        )
+                        answer_column.append("; ".join(matrix_entries))
 
-Die im System y enthaltenen Personendaten, besonders schützenswerten Personendaten, Daten von juristischen Personen und besonders schützenswerten Daten von juristischen Personen, dürfen so lange aufbewahrt werden, wie es der Bearbeitungszweck erfordert
-</BEISPIEL>
+        elif planned.id in answers:
+            question_column.append(planned.text)
+            answer_column.append(format_answer(answers[planned.id]))
 
-<BEISPIEL>
-1. Abschnitt:     Aufbewahrung
-Art 155     Grundsatz
-Die im Informationssystem des BAZG enthaltenen besonders schützenswerten Personendaten, besonders schützenswerten Daten von juristischen Personen, Daten, die auf einer Risikoanalyse beruhen, und Daten, die auf einem Profiling oder einem Profiling mit hohem Risiko beruhen, dürfen so lange aufbewahrt werden, wie es der Bearbeitungszweck erfordert, längstens aber bis zum Ablauf der Dauer nach den Artikeln 156−167.
+    # Translate column headers based on language
+    if language == "en":
+        question_label, answer_label = "Question", "Answer"
+    else:
+        question_label, answer_label = "Frage", "Antwort"
 
-Art 160     Datenkategorie Vollzug von Strafen und Massnahmen
-Das BAZG darf besonders schützenswerte Personendaten und besonders schützenswerte Daten von juristischen Personen der Datenkategorie Vollzug von Strafen und Massnahmen nach Verfahrensabschluss höchstens 5 Jahre aufbewahren.
+    return pd.DataFrame({question_label: question_column, answer_label: answer_column})
 
-Art 168     Nicht besonders schützenswerte Personendaten und nicht besonders schützenswerte Daten von juristischen Personen
-Der Bundesrat regelt die Aufbewahrungsdauer für die nicht besonders schützenswerten Personendaten und die nicht besonders schützenswerten Daten von juristischen Personen.
-</BEISPIEL>
 
+@st.cache_data(show_spinner=False)
+def build_summary_markdown(answers_frozen, language):
+    """
+    Render the summary table as markdown for the policy prompt
 
-<ARCHIVIERUNG_UND_VERNICHTUNG>
+    Args:
+        answers_frozen (tuple): The current answers, as returned by freeze_answers
+        language (str): The language for question labels and column headers
 
-<BEISPIEL>
-2. Abschnitt:     Archivierung und Vernichtung
-Art. 169
-1 Die Archivierung von im Informationssystem des BAZG enthaltenen Daten richtet sich nach dem Archivierungsgesetz vom 26. Juni 1998.
-2 Personendaten, die das Bundesarchiv archiviert, sind vom BAZG zu vernichten. Bewertet das Bundesarchiv die angebotenen Daten als nicht archivwürdig, so ist Artikel 38 Absatz 2 des Datenschutzgesetzes vom 25. September 2020 (DSG) anwendbar.
+    Returns:
+        str: The summary table as a markdown table
+    """
+    return build_summary_dataframe(answers_frozen, language).to_markdown()
 
-</BEISPIEL>
 
-<BEISPIEL>
+@st.cache_data(ttl=3600, max_entries=16, show_spinner=True)
+def generate_policy_text(dataset, token_fingerprint):
+    """
+    Ask the LLM to draft a privacy policy from the summary table
 
-</BEISPIEL>
+    Identical summaries reuse the cached draft instead of calling the LLM again.
 
-<BEISPIEL>
+    Args:
+        dataset (str): The summary table as markdown
+        token_fingerprint (str): Hash of the API token, so drafts made with a
+            previous token are not reused after it changes
 
-</BEISPIEL>
+    Returns:
+        str: The drafted privacy policy as markdown
+    """
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {load_api_token()}",
+    }
 
-<BEISPIEL>
+    json_data = {
+        "model": "llama3.3-70b",
+        "stream": False,
+        "messages": [
+            {
+                "content": POLICY_PROMPT.format(dataset=dataset),
+                "role": "user",
+            },
+        ],
+        "temperature": 0,
+        "max_completion_tokens": -1,
+        "seed": 0,
+        "top_p": 1,
+    }
 
-</BEISPIEL>
+    response = get_http_session().post(
+        "https://api.cerebras.ai/v1/chat/completions",
+        headers=headers,
+        json=json_data,
+        timeout=60,
+    )
+    return response.json()["choices"][0]["message"]["content"]
 
-<BEISPIEL>
 
-</BEISPIEL>
+@st.fragment
+def render_summary(answers):
+    """
+    Render a summary of all answers
 
-<BEISPIEL>
+    Runs as a fragment, so pressing the generate button only reruns the summary.
 
-</BEISPIEL>
+    Args:
+        answers (dict): The current answers
+    """
+    language = st.session_state.get("language", "de")
 
-<BEISPIEL>
+    st.header(get_text("summary_title", language))
 
-</BEISPIEL>
+    # Reuse the last summary while the answers are unchanged, this skips
+    # freezing and hashing the answers for the data cache on repeat views
+    cache_key = (st.session_state.answers_version, language)
+    cached = st.session_state.get("summary_cache")
+    if cached is not None and cached[0] == cache_key:
+        df = cached[1]
+    else:
+        df = build_summary_dataframe(freeze_answers(answers), language)
+        st.session_state.summary_cache = (cache_key, df)
 
-<BEISPIEL>
+    if df.empty:
+        st.info(get_text("no_answers", language))
+        return
 
-</BEISPIEL>
+    # The answers table is always shown, the policy draft below it
+    st.dataframe(df, use_container_width=True, hide_index=True)
 
+    # Only call the LLM on request, other reruns show the stored text
+    generate = st.button(
+        get_text("generate_policy_text", language), key="generate_policy_text"
+    )
+    if not generate:
+        policy_text = st.session_state.get("policy_text")
+        if policy_text is not None and policy_text[0] == cache_key:
+            st.markdown(policy_text[1])
+        return
+
+    policy_text = generate_policy_text(
+        build_summary_markdown(freeze_answers(answers), language),
+        api_token_fingerprint(),
+    )
+    st.session_state.policy_text = (cache_key, policy_text)
+    st.markdown(policy_text)
 
 
-"""
-            prompt = prompt + "\n" + prompt_template
-            json_data = {
-                "model": "llama3.3-70b",
-                "stream": False,
-                "messages": [
-                    {
-                        "content": prompt.format(df.to_markdown()),
-                        "role": "user",
-                    },
-                ],
-                "temperature": 0,
-                "max_completion_tokens": -1,
-                "seed": 0,
-                "top_p": 1,
-            }
-
-            response = requests.post(
-                "https://api.cerebras.ai/v1/chat/completions",
-                headers=headers,
-                json=json_data,
-            )
-            st.markdown(json.loads(response.text)["choices"][0]["message"]["content"])
-        else:
-            st.dataframe(df, use_container_width=True)
-    else:
-        st.info(get_text("no_answers", language))
+def apply_language_selection():
+    """Apply the sidebar language choice before the rerun it triggers renders"""
+    st.session_state.language = st.session_state.language_selector
 
 
 def render_sidebar():
     """Render the sidebar for session management and language selection"""
     language = st.session_state.get("language", "de")
+    t = get_text_bundle(language)
 
-    st.sidebar.title(get_text("sidebar_title", language))
+    st.sidebar.title(t.sidebar_title)
     st.sidebar.markdown("---")
 
     # Language selection
-    st.sidebar.subheader(get_text("language_selection", language))
-    language_options = {
-        "de": get_text("language_de", language),
-        "en": get_text("language_en", language),
-    }
-    selected_language = st.sidebar.radio(
+    st.sidebar.subheader(t.language_selection)
+    st.sidebar.radio(
         label="",
-        options=list(language_options.keys()),
-        format_func=lambda x: language_options[x],
-        index=0 if language == "de" else 1,
+        options=AVAILABLE_LANGUAGES,
+        format_func=LANGUAGE_LABELS[language].__getitem__,
+        index=AVAILABLE_LANGUAGES.index(language),
         label_visibility="collapsed",
         key="language_selector",
+        on_change=apply_language_selection,
     )
 
-    # Update language in session state if changed
-    if selected_language != st.session_state.get("language", "de"):
-        st.session_state.language = selected_language
-        st.rerun()
-
     st.sidebar.markdown("---")
 
     # Session management section
-    st.sidebar.header(get_text("session_management", language))
+    st.sidebar.header(t.session_management)
 
     # Progress indicator
     if not st.session_state.completed:
@@ -1149,30 +1484,25 @@ def render_sidebar():
         progress = min(1.0, (current_index + 1) / len(questions))
         st.sidebar.progress(progress)
         st.sidebar.caption(
-            get_formatted_text(
-                "question_progress",
-                language,
-                current=current_index + 1,
-                total=len(questions),
-            )
+            t.question_progress.format(current=current_index + 1, total=len(questions))
         )
 
     # Session actions
     session_action = st.sidebar.radio(
-        get_text("session_options", language),
+        t.session_options,
         [
-            get_text("continue_session", language),
-            get_text("export_session", language),
-            get_text("import_session", language),
-            get_text("new_session", language),
+            t.continue_session,
+            t.export_session,
+            t.import_session,
+            t.new_session,
         ],
     )
 
-    if session_action == get_text("export_session", language):
+    if session_action == t.export_session:
         # Allow custom naming
         session_name = st.sidebar.text_input(
-            get_text("session_name", language),
-            help=get_text("auto_name", language),
+            t.session_name,
+            help=t.auto_name,
         )
 
         # Generate the export data
@@ -1182,37 +1512,35 @@ def render_sidebar():
 
         # Create download button
         st.sidebar.download_button(
-            label=get_text("download_session", language),
+            label=t.download_session,
             data=file_content,
             file_name=file_name,
             mime="application/json",
-            help=get_text("download_help", language),
+            help=t.download_help,
         )
 
-    elif session_action == get_text("import_session", language):
+    elif session_action == t.import_session:
         # First-stage: File uploader
         uploaded_file = st.sidebar.file_uploader(
-            get_text("upload_session", language),
+            t.upload_session,
             type=["json"],
-            help=get_text("file_upload_help", language),
+            help=t.file_upload_help,
             key="session_uploader",
         )
 
         # Second-stage: Only process when button is clicked
         if uploaded_file is not None:
-            if st.sidebar.button(
-                get_text("import_button", language), key="confirm_import"
-            ):
+            if st.sidebar.button(t.import_button, key="confirm_import"):
                 if session_manager.import_session(uploaded_file):
-                    st.sidebar.success(get_text("session_imported", language))
+                    st.sidebar.success(t.session_imported)
                     # Force refresh to apply the imported session
                     st.rerun()
 
-    elif session_action == get_text("new_session", language):
-        if st.sidebar.button(get_text("confirm_new", language)):
+    elif session_action == t.new_session:
+        if st.sidebar.button(t.confirm_new):
             # Reset session state
             session_manager.reset_session()
-            st.sidebar.success(get_text("session_reset", language))
+            st.sidebar.success(t.session_reset)
             # Force refresh
             st.rerun()
 
@@ -1220,15 +1548,15 @@ def render_sidebar():
 
     # Navigation between sections when questionnaire is complete
     if st.session_state.completed:
-        st.sidebar.header(get_text("navigation", language))
+        st.sidebar.header(t.navigation)
 
         view_mode = st.sidebar.radio(
-            get_text("view_mode", language),
+            t.view_mode,
             [
-                get_text("summary_view", language),
-                get_text("edit_answers_view", language),
-                get_text("visualize_view", language),
-                get_text("policy_view", language),
+                t.summary_view,
+                t.edit_answers_view,
+                t.visualize_view,
+                t.policy_view,
             ],
         )
 
@@ -1237,30 +1565,78 @@ def render_sidebar():
     return None
 
 
+def render_navigation(current_question, current_index, all_answered, t, in_form=False):
+    """
+    Render the Previous and Next/Complete buttons below a questionnaire page
+
+    Inside a form the buttons also submit the pending answers, so the forward
+    button stays enabled and only advances once the submitted page is complete.
+
+    Args:
+        current_question (dict): The question or section shown on the page
+        current_index (int): Index of the page in the questionnaire
+        all_answered (bool): Whether the page is fully answered
+        t (SimpleNamespace): The translation bundle of the UI language
+        in_form (bool, optional): Whether the page is rendered inside an st.form
+    """
+    button = st.form_submit_button if in_form else st.button
+    col1, col2, col3 = st.columns([1, 1, 1])
+
+    with col1:
+        if current_index > 0:
+            if button(t.previous):
+                st.session_state.current_question_index -= 1
+                st.rerun()
+
+    with col3:
+        if all_answered or in_form:
+            if current_index < len(questions) - 1:
+                if button(t.next) and all_answered:
+                    st.session_state.current_question_index += 1
+                    st.rerun()
+            else:
+                if button(t.complete) and all_answered:
+                    st.session_state.completed = True
+                    # Remind user to download their session
+                    st.success(t.completion_success)
+                    st.rerun()
+        else:
+            st.button(t.next, disabled=True)
+
+        if not all_answered:
+            if current_question["type"] in [
+                "repeated_section",
+                "section",
+                "special",
+            ]:
+                st.warning(t.section_required_warning)
+            else:
+                required = current_question.get("required", False)
+                if required:
+                    st.warning(t.required_warning)
+
+
 def main():
     """Main application function"""
     language = st.session_state.get("language", "de")
+    t = get_text_bundle(language)
 
-    # st.title(get_text("app_title", language))
-
-    # Initialize visualizer and policy generator
-    visualizer = DataFlowVisualizer()
-    policy_generator = PolicyGenerator()
+    # st.title(t.app_title)
 
     # Render sidebar and get the selected view mode
     view_mode = render_sidebar()
 
     # If questionnaire is completed, show the selected view
     if st.session_state.completed and view_mode:
-        if view_mode == get_text("summary_view", language):
+        if view_mode == t.summary_view:
             render_summary(st.session_state.answers)
 
-        elif view_mode == get_text("edit_answers_view", language):
-            st.header(get_text("edit_responses", language))
-            st.info(get_text("edit_answers_view", language))
+        elif view_mode == t.edit_answers_view:
+            st.header(t.edit_responses)
+            st.info(t.edit_answers_view)
 
             edit_index = st.number_input(
-                get_text("edit_question_number", language),
+                t.edit_question_number,
                 min_value=1,
                 max_value=len(questions),
                 value=1,
@@ -1269,32 +1645,25 @@ def main():
             # Display the selected question for editing
             current_question = questions[edit_index - 1]
 
-            if current_question["type"] == "repeated_section":
-                render_repeated_section(current_question, st.session_state.answers)
-            elif current_question["type"] == "section":
-                if should_show_question(current_question, st.session_state.answers):
-                    render_section(current_question, st.session_state.answers)
-                else:
-                    st.info(get_text("section_not_applicable", language))
-            elif current_question["type"] == "special":
-                if current_question.get("special_type") == "responsible_processors":
-                    render_responsible_processors_question(current_question)
-                elif current_question.get("special_type") == "processor_matrix":
-                    render_processor_matrix_question(current_question)
+            if (
+                current_question["type"] == "section"
+                and current_question["id"] in st.session_state.hidden_questions
+            ):
+                st.info(t.section_not_applicable)
             else:
-                render_question(current_question)
+                render_top_level_question(current_question, language)
 
             # Add a button to save changes
-            if st.button(get_text("save_changes", language)):
-                st.success(get_text("changes_saved", language))
+            if st.button(t.save_changes):
+                st.success(t.changes_saved)
 
-        elif view_mode == get_text("visualize_view", language):
-            st.header(get_text("visualize", language))
-            visualizer.render_visualization(st.session_state.answers)
+        elif view_mode == t.visualize_view:
+            st.header(t.visualize)
+            get_visualizer().render_visualization(st.session_state.answers)
 
-        elif view_mode == get_text("policy_view", language):
-            st.header(get_text("policy_suggestions", language))
-            policy_generator.render_policy_suggestions(st.session_state.answers)
+        elif view_mode == t.policy_view:
+            st.header(t.policy_suggestions)
+            get_policy_generator().render_policy_suggestions(st.session_state.answers)
 
     # If questionnaire is not completed or "Edit Responses" is selected, show the questionnaire
     else:
@@ -1304,65 +1673,25 @@ def main():
         if current_index < len(questions):
             current_question = questions[current_index]
 
-            all_answered = False
-
-            if current_question["type"] == "repeated_section":
-                all_answered = render_repeated_section(
-                    current_question, st.session_state.answers
-                )
-            elif current_question["type"] == "section":
-                if should_show_question(current_question, st.session_state.answers):
-                    all_answered = render_section(
-                        current_question, st.session_state.answers
-                    )
-                else:
-                    # Skip this section
-                    st.session_state.current_question_index += 1
-                    st.rerun()
-            elif current_question["type"] == "special":
-                if current_question.get("special_type") == "responsible_processors":
-                    all_answered = render_responsible_processors_question(
-                        current_question
+            if (
+                current_question["type"] == "section"
+                and current_question["id"] in st.session_state.hidden_questions
+            ):
+                # Skip this section
+                st.session_state.current_question_index += 1
+                st.rerun()
+
+            if current_question["_form_safe"]:
+                # Choice widgets inside a form only rerun the app when the page
+                # is submitted through one of the navigation buttons
+                with st.form(f"question_form_{current_question['id']}"):
+                    all_answered = render_top_level_question(current_question, language)
+                    render_navigation(
+                        current_question, current_index, all_answered, t, in_form=True
                     )
-                elif current_question.get("special_type") == "processor_matrix":
-                    all_answered = render_processor_matrix_question(current_question)
             else:
-                all_answered = render_question(current_question)
-
-            # Navigation buttons
-            col1, col2, col3 = st.columns([1, 1, 1])
-
-            with col1:
-                if current_index > 0:
-                    if st.button(get_text("previous", language)):
-                        st.session_state.current_question_index -= 1
-                        st.rerun()
-
-            with col3:
-                if all_answered:
-                    if current_index < len(questions) - 1:
-                        if st.button(get_text("next", language)):
-                            st.session_state.current_question_index += 1
-                            st.rerun()
-                    else:
-                        if st.button(get_text("complete", language)):
-                            st.session_state.completed = True
-                            # Remind user to download their session
-                            st.success(get_text("completion_success", language))
-                            st.rerun()
-                else:
-                    st.button(get_text("next", language), disabled=True)
-
-                    if current_question["type"] in [
-                        "repeated_section",
-                        "section",
-                        "special",
-                    ]:
-                        st.warning(get_text("section_required_warning", language))
-                    else:
-                        required = current_question.get("required", False)
-                        if required:
-                            st.warning(get_text("required_warning", language))
+                all_answered = render_top_level_question(current_question, language)
+                render_navigation(current_question, current_index, all_answered, t)
 
 
 if __name__ == "__main__":
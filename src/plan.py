@@ -0,0 +1,85 @@
+"""
+Question plan module for the Data Flow Assessment tool.
+Flattens the questionnaire into the questions visible for a set of answers.
+"""
+
+from typing import NamedTuple
+
+import streamlit as st
+
+from questions import (
+    questions,
+    should_show_question,
+    compute_hidden_questions,
+    resolve_item,
+)
+
+
+class PlannedQuestion(NamedTuple):
+    """A concrete question with its {item} placeholder resolved"""
+
+    id: str
+    text: str
+    type: str
+    question: dict
+
+
+@st.cache_data(show_spinner=False)
+def compile_plan(answers_frozen):
+    """
+    Flatten the questionnaire into the questions visible for the given answers.
+
+    Args:
+        answers_frozen (tuple): The current answers, as returned by freeze_answers
+
+    Returns:
+        list: PlannedQuestion entries in questionnaire order
+    """
+    answers = dict(answers_frozen)
+    hidden = compute_hidden_questions(answers)
+    plan = []
+
+    for question in questions:
+        # Sections contribute their sub-questions when the section is visible
+        if question["type"] == "section":
+            if question["id"] not in hidden:
+                for sub_q in question["questions"]:
+                    plan.append(
+                        PlannedQuestion(
+                            sub_q["id"], sub_q["text"], sub_q["type"], sub_q
+                        )
+                    )
+
+        # Repeated sections contribute one copy of each sub-question per item
+        elif question["type"] == "repeated_section":
+            for item in answers.get(question["repeat_for"], []):
+                for sub_q in question["questions"]:
+                    # The condition's {item} placeholder is resolved during the check
+                    if not should_show_question(sub_q, answers, item):
+                        continue
+
+                    question_id = sub_q["id"]
+                    if sub_q["_id_has_item"]:
+                        question_id = resolve_item(question_id, item)
+                    question_text = sub_q["text"]
+                    if sub_q["_text_has_item"]:
+                        question_text = resolve_item(question_text, item)
+
+                    plan.append(
+                        PlannedQuestion(
+                            question_id,
+                            f"{question_text} ({item})",
+                            sub_q["type"],
+                            sub_q,
+                        )
+                    )
+
+        # Regular and special questions are listed as they are
+        elif question["id"] not in hidden:
+            plan.append(
+                PlannedQuestion(
+                    question["id"], question["text"], question["type"], question
+                )
+            )
+
+    return plan
@@ -3,10 +3,173 @@ Policy suggestion module for the Data Flow Assessment tool.
 Placeholder for future implementation of policy recommendations.
 """
 
+import csv
+import io
+import json
+from typing import NamedTuple
+
 import streamlit as st
-import pandas as pd
-from questions import SENSITIVE_DATA_CATEGORIES
-from translations import get_text, get_formatted_text
+from questions import SENSITIVE_DATA_CATEGORIES, resolve_item
+from translations import AVAILABLE_LANGUAGES, get_text, get_formatted_text
+
+# Category options for O(1) membership checks in the rule conditions
+SENSITIVE_CATEGORY_SET = frozenset(SENSITIVE_DATA_CATEGORIES)
+
+# ID template of the data category question repeated for each data type
+_DATA_CATEGORIES_ID = "data_categories_{item}"
+
+
+class AnswersView(NamedTuple):
+    """Answer values the policy rules check, derived once per evaluation"""
+
+    data_types: tuple
+    sensitive_data_types: frozenset
+
+    @classmethod
+    def from_answers(cls, answers):
+        """
+        Build the view from the questionnaire answers.
+
+        Args:
+            answers (dict): Questionnaire answers
+
+        Returns:
+            AnswersView: Values the rule conditions read
+        """
+        data_types = tuple(answers.get("data_types", []))
+        return cls(
+            data_types=data_types,
+            sensitive_data_types=frozenset(
+                data_type
+                for data_type in data_types
+                if not SENSITIVE_CATEGORY_SET.isdisjoint(
+                    answers.get(resolve_item(_DATA_CATEGORIES_ID, data_type), ())
+                )
+            ),
+        )
+
+
+def _always_applies(view):
+    """Condition of the placeholder rules that are always recommended"""
+    return True
+
+
+def _has_sensitive_data(view):
+    """Condition of the sensitive data rule"""
+    return bool(view.sensitive_data_types)
+
+
+# Policy rules, built once at import and shared by every generator. Each
+# condition takes an AnswersView and only runs once the answers listed under
+# "requires" are present.
+_POLICY_RULES = (
+    {
+        "id": "sensitive_data",
+        "requires": ("data_types",),
+        "condition": _has_sensitive_data,
+        "policy": {
+            "de": "Schutz sensibler Daten",
+            "en": "Protection of Sensitive Data",
+        },
+        "description": {
+            "de": "Ihr System verarbeitet sensible persönliche Daten, die zusätzliche Schutzmaßnahmen erfordern.",
+            "en": "Your system processes sensitive personal data that requires additional protection measures.",
+        },
+        "recommendations": {
+            "de": (
+                "Implementieren Sie stärkere Sicherheitsmaßnahmen für sensible Daten",
+                "Minimieren Sie die Erfassung und Speicherung sensibler Daten",
+                "Erwägen Sie Pseudonymisierungs- oder Anonymisierungstechniken",
+            ),
+            "en": (
+                "Implement stronger security measures for sensitive data",
+                "Minimize the collection and storage of sensitive data",
+                "Consider pseudonymization or anonymization techniques",
+            ),
+        },
+    },
+    {
+        "id": "data_access",
+        "condition": _always_applies,  # Always recommend for placeholder
+        "policy": {"de": "Zugriffskontrollen", "en": "Access Controls"},
+        "description": {
+            "de": "Ihr System sollte klare Zugriffskontrollen implementieren.",
+            "en": "Your system should implement clear access controls.",
+        },
+        "recommendations": {
+            "de": (
+                "Dokumentieren Sie Richtlinien für rollenbasierten Zugriff (RBAC)",
+                "Implementieren Sie das Prinzip der geringsten Privilegien",
+                "Überprüfen Sie regelmäßig die Zugriffsrechte der Benutzer",
+            ),
+            "en": (
+                "Document policies for role-based access control (RBAC)",
+                "Implement the principle of least privilege",
+                "Regularly review user access rights",
+            ),
+        },
+    },
+    {
+        "id": "data_retention",
+        "condition": _always_applies,  # Always recommend for placeholder
+        "policy": {
+            "de": "Datenspeicherungsrichtlinien",
+            "en": "Data Retention Policies",
+        },
+        "description": {
+            "de": "Ihr System sollte eine klare Datenspeicherungsrichtlinie haben.",
+            "en": "Your system should have a clear data retention policy.",
+        },
+        "recommendations": {
+            "de": (
+                "Legen Sie Datenspeicherungsfristen für alle Datentypen fest",
+                "Erstellen Sie einen Zeitplan für die Datenlöschung und automatisieren Sie diesen, wenn möglich",
+                "Implementieren Sie sichere Datenvernichtungsmethoden",
+            ),
+            "en": (
+                "Set data retention periods for all data types",
+                "Create a schedule for data deletion and automate it if possible",
+                "Implement secure data destruction methods",
+            ),
+        },
+    },
+)
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _cached_suggestions(_generator, rules_id, signature, language):
+    """
+    Evaluate the policy rules, cached on the rules, the answers and the language.
+
+    Args:
+        _generator (PolicyGenerator): The generator (not hashed)
+        rules_id (int): Identity of the generator's rule list, so reloaded rules
+            don't reuse suggestions computed from the old ones
+        signature (tuple): The answers the rules depend on, from answers_signature
+        language (str): Language of the returned texts
+
+    Returns:
+        list: List of applicable policy suggestions
+    """
+    return _generator._evaluate_policy_rules(signature, language)
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _cached_export(_generator, rules_id, suggestion_ids, format, language):
+    """
+    Export the policy suggestions, cached on the suggestions, format and language.
+
+    Args:
+        _generator (PolicyGenerator): The generator (not hashed)
+        rules_id (int): Identity of the generator's rule list
+        suggestion_ids (tuple): IDs of the applicable rules, in rule order
+        format (str): Output format ("markdown", "csv", "json")
+        language (str): Language of the exported texts
+
+    Returns:
+        str: Formatted policy suggestions
+    """
+    return _generator._build_export(suggestion_ids, format, language)
 
 
 class PolicyGenerator:
@@ -18,88 +181,50 @@ class PolicyGenerator:
         """Initialize the policy generator."""
         # Load policy rules and templates
         self.policy_rules = self._load_policy_rules()
+        self._required_answers = frozenset(
+            key for rule in self.policy_rules for key in rule.get("requires", ())
+        )
+        # The suggestion each rule yields, prebuilt for every language
+        self._localized_rules = {
+            language: [
+                {
+                    "id": rule["id"],
+                    "policy": rule["policy"][language],
+                    "description": rule["description"][language],
+                    "recommendations": rule["recommendations"][language],
+                }
+                for rule in self.policy_rules
+            ]
+            for language in AVAILABLE_LANGUAGES
+        }
 
     def _load_policy_rules(self):
         """
         Load simplified policy rules for the placeholder implementation.
 
         Returns:
-            list: List of policy rule dictionaries
-        """
-        return [
-            {
-                "id": "sensitive_data",
-                "condition": lambda answers: any(
-                    len(answers.get(f"data_categories_{data_type}", [])) > 0
-                    for data_type in answers.get("data_types", [])
-                ),
-                "policy": {
-                    "de": "Schutz sensibler Daten",
-                    "en": "Protection of Sensitive Data",
-                },
-                "description": {
-                    "de": "Ihr System verarbeitet sensible persönliche Daten, die zusätzliche Schutzmaßnahmen erfordern.",
-                    "en": "Your system processes sensitive personal data that requires additional protection measures.",
-                },
-                "recommendations": {
-                    "de": [
-                        "Implementieren Sie stärkere Sicherheitsmaßnahmen für sensible Daten",
-                        "Minimieren Sie die Erfassung und Speicherung sensibler Daten",
-                        "Erwägen Sie Pseudonymisierungs- oder Anonymisierungstechniken",
-                    ],
-                    "en": [
-                        "Implement stronger security measures for sensitive data",
-                        "Minimize the collection and storage of sensitive data",
-                        "Consider pseudonymization or anonymization techniques",
-                    ],
-                },
-            },
-            {
-                "id": "data_access",
-                "condition": lambda answers: True,  # Always recommend for placeholder
-                "policy": {"de": "Zugriffskontrollen", "en": "Access Controls"},
-                "description": {
-                    "de": "Ihr System sollte klare Zugriffskontrollen implementieren.",
-                    "en": "Your system should implement clear access controls.",
-                },
-                "recommendations": {
-                    "de": [
-                        "Dokumentieren Sie Richtlinien für rollenbasierten Zugriff (RBAC)",
-                        "Implementieren Sie das Prinzip der geringsten Privilegien",
-                        "Überprüfen Sie regelmäßig die Zugriffsrechte der Benutzer",
-                    ],
-                    "en": [
-                        "Document policies for role-based access control (RBAC)",
-                        "Implement the principle of least privilege",
-                        "Regularly review user access rights",
-                    ],
-                },
-            },
-            {
-                "id": "data_retention",
-                "condition": lambda answers: True,  # Always recommend for placeholder
-                "policy": {
-                    "de": "Datenspeicherungsrichtlinien",
-                    "en": "Data Retention Policies",
-                },
-                "description": {
-                    "de": "Ihr System sollte eine klare Datenspeicherungsrichtlinie haben.",
-                    "en": "Your system should have a clear data retention policy.",
-                },
-                "recommendations": {
-                    "de": [
-                        "Legen Sie Datenspeicherungsfristen für alle Datentypen fest",
-                        "Erstellen Sie einen Zeitplan für die Datenlöschung und automatisieren Sie diesen, wenn möglich",
-                        "Implementieren Sie sichere Datenvernichtungsmethoden",
-                    ],
-                    "en": [
-                        "Set data retention periods for all data types",
-                        "Create a schedule for data deletion and automate it if possible",
-                        "Implement secure data destruction methods",
-                    ],
-                },
-            },
-        ]
+            tuple: The policy rule dictionaries, whose conditions take an
+                AnswersView and whose recommendations are tuples
+        """
+        return _POLICY_RULES
+
+    def answers_signature(self, answers):
+        """
+        Reduce the answers to the values the policy rules depend on.
+
+        Answers no rule looks at are left out, so editing them reuses the
+        cached suggestions.
+
+        Args:
+            answers (dict): Questionnaire answers
+
+        Returns:
+            tuple: The AnswersView and the set of required answer ids present
+        """
+        return (
+            AnswersView.from_answers(answers),
+            frozenset(key for key in self._required_answers if key in answers),
+        )
 
     def generate_policy_suggestions(self, answers):
         """
@@ -111,26 +236,38 @@ class PolicyGenerator:
         Returns:
             list: List of applicable policy suggestions
         """
-        applicable_policies = []
         language = st.session_state.get("language", "de")
 
+        return _cached_suggestions(
+            self, id(self.policy_rules), self.answers_signature(answers), language
+        )
+
+    def _evaluate_policy_rules(self, signature, language):
+        """
+        Evaluate the policy rules against the answers.
+
+        Args:
+            signature (tuple): The answers the rules depend on, from
+                answers_signature
+            language (str): Language of the returned texts
+
+        Returns:
+            list: List of applicable policy suggestions
+        """
+        applicable_policies = []
+        view, present_answers = signature
+
         # For the placeholder, just return all policies
-        for rule in self.policy_rules:
-            try:
-                if rule["condition"](answers):
-                    applicable_policies.append(
-                        {
-                            "id": rule["id"],
-                            "policy": rule["policy"][language],
-                            "description": rule["description"][language],
-                            "recommendations": rule["recommendations"][language],
-                        }
-                    )
-            except (KeyError, TypeError, Exception) as e:
-                # Skip rules that can't be evaluated due to missing data
-                st.warning(f"Error evaluating policy rule {rule['id']}: {str(e)}")
+        for rule, suggestion in zip(
+            self.policy_rules, self._localized_rules[language]
+        ):
+            # Skip rules that can't be evaluated due to missing data
+            if not present_answers.issuperset(rule.get("requires", ())):
                 continue
 
+            if rule["condition"](view):
+                applicable_policies.append(suggestion)
+
         return applicable_policies
 
     def render_policy_suggestions(self, answers):
@@ -158,14 +295,19 @@ class PolicyGenerator:
             )
         )
 
+        description_label = get_text("policy_description", language)
+        recommendations_label = get_text("policy_recommendations_label", language)
+
         for i, suggestion in enumerate(suggestions, 1):
             with st.expander(f"{i}. {suggestion['policy']}"):
+                # One markdown block per expander instead of one per line
+                recommendations = "\n".join(
+                    f"- {rec}" for rec in suggestion["recommendations"]
+                )
                 st.markdown(
-                    f"**{get_text('policy_description', language)}** {suggestion['description']}"
+                    f"**{description_label}** {suggestion['description']}\n\n"
+                    f"**{recommendations_label}**\n\n{recommendations}"
                 )
-                st.markdown(f"**{get_text('policy_recommendations_label', language)}**")
-                for rec in suggestion["recommendations"]:
-                    st.markdown(f"- {rec}")
 
     def export_policy_suggestions(self, answers, format="markdown"):
         """
@@ -179,7 +321,32 @@ class PolicyGenerator:
             str: Formatted policy suggestions
         """
         language = st.session_state.get("language", "de")
-        suggestions = self.generate_policy_suggestions(answers)
+
+        # Answers that yield the same suggestions share one export
+        suggestion_ids = tuple(
+            suggestion["id"] for suggestion in self.generate_policy_suggestions(answers)
+        )
+        return _cached_export(
+            self, id(self.policy_rules), suggestion_ids, format, language
+        )
+
+    def _build_export(self, suggestion_ids, format, language):
+        """
+        Format the policy suggestions for export.
+
+        Args:
+            suggestion_ids (tuple): IDs of the applicable rules, in rule order
+            format (str): Output format ("markdown", "csv", "json")
+            language (str): Language of the exported texts
+
+        Returns:
+            str: Formatted policy suggestions
+        """
+        suggestions = [
+            suggestion
+            for suggestion in self._localized_rules[language]
+            if suggestion["id"] in suggestion_ids
+        ]
 
         if not suggestions:
             return get_text("no_policy_suggestions", language)
@@ -189,43 +356,47 @@ class PolicyGenerator:
             description_label = get_text("policy_description", language)
             recommendations_label = get_text("policy_recommendations_label", language)
 
-            md_content = f"# {policy_title}\n\n"
+            parts = [f"# {policy_title}\n\n"]
 
             for suggestion in suggestions:
-                md_content += f"## {suggestion['policy']}\n\n"
-                md_content += f"{suggestion['description']}\n\n"
-                md_content += f"### {recommendations_label}\n\n"
+                parts.append(f"## {suggestion['policy']}\n\n")
+                parts.append(f"{suggestion['description']}\n\n")
+                parts.append(f"### {recommendations_label}\n\n")
 
                 for rec in suggestion["recommendations"]:
-                    md_content += f"- {rec}\n"
+                    parts.append(f"- {rec}\n")
 
-                md_content += "\n"
+                parts.append("\n")
 
-            return md_content
+            return "".join(parts)
 
         elif format == "csv":
             # Flatten the suggestions for CSV format
-            rows = []
             policy_label = get_text("policy_suggestions", language)
             description_label = get_text("policy_description", language)
             recommendation_label = get_text("policy_recommendations_label", language)
 
-            for suggestion in suggestions:
-                for rec in suggestion["recommendations"]:
-                    rows.append(
-                        {
-                            policy_label: suggestion["policy"],
-                            description_label: suggestion["description"],
-                            recommendation_label: rec,
-                        }
-                    )
-
-            df = pd.DataFrame(rows)
-            return df.to_csv(index=False)
+            rows = [
+                {
+                    policy_label: suggestion["policy"],
+                    description_label: suggestion["description"],
+                    recommendation_label: rec,
+                }
+                for suggestion in suggestions
+                for rec in suggestion["recommendations"]
+            ]
+
+            buffer = io.StringIO()
+            writer = csv.DictWriter(
+                buffer,
+                fieldnames=[policy_label, description_label, recommendation_label],
+                lineterminator="\n",
+            )
+            writer.writeheader()
+            writer.writerows(rows)
+            return buffer.getvalue()
 
         elif format == "json":
-            import json
-
             return json.dumps(suggestions, indent=2)
 
         else:
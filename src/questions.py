@@ -3,6 +3,10 @@ Question definition module for the Data Flow Assessment tool.
 This module contains the structure of all questions, their types, and branching logic.
 """
 
+import functools
+import operator
+import re
+
 # Define question types
 TEXT = "text"
 SINGLE_CHOICE = "single_choice"
@@ -247,6 +251,114 @@ questions = [
 ]
 
 
+def _build_question_index(question_list):
+    """
+    Index all questions, including those nested in sections, by ID.
+
+    Args:
+        question_list (list): The questionnaire structure
+
+    Returns:
+        dict: Mapping of question ID (or template ID) to question
+    """
+    index = {}
+    for question in question_list:
+        index[question["id"]] = question
+        # Plain sections and repeated sections both nest their questions
+        if "questions" in question:
+            for nested_question in question["questions"]:
+                index[nested_question["id"]] = nested_question
+    return index
+
+
+# Question types whose widgets need no callbacks or buttons of their own
+_FORM_WIDGET_TYPES = frozenset({SINGLE_CHOICE, MULTIPLE_CHOICE, NUMBER, TOGGLE})
+
+
+def _prepare_questions(question_list):
+    """
+    Precompute lookup helpers on the question definitions and freeze their lists.
+
+    Multiple choice questions get an "_options_set" for constant time option checks,
+    single choice questions an "_option_index" mapping each option to its position
+    and number questions a "_num_ctor" that converts their stored answer. The
+    "_id_has_item", "_text_has_item" and "_condition_has_item" flags tell whether
+    the {item} placeholder has to be resolved. "_form_safe" marks questions and
+    sections made only of unconditional choice and number widgets, which can be
+    rendered inside an st.form. Option and sub-question lists become tuples,
+    since the schema never changes at runtime.
+
+    Args:
+        question_list (list): The questionnaire structure
+
+    Returns:
+        tuple: The prepared questions
+    """
+    for question in question_list:
+        question["_id_has_item"] = "{item}" in question["id"]
+        question["_text_has_item"] = "{item}" in question.get("text", "")
+        question["_condition_has_item"] = (
+            "condition" in question and "{item}" in question["condition"]["question_id"]
+        )
+        if "options" in question:
+            question["options"] = tuple(question["options"])
+        if question["type"] == "multiple_choice":
+            question["_options_set"] = frozenset(question["options"])
+        elif question["type"] == "single_choice":
+            question["_option_index"] = {
+                option: index for index, option in enumerate(question["options"])
+            }
+        elif question["type"] == "number":
+            question["_num_ctor"] = float
+        if "questions" in question:
+            question["questions"] = _prepare_questions(question["questions"])
+            question["_form_safe"] = all(
+                sub_question["_form_safe"] and "condition" not in sub_question
+                for sub_question in question["questions"]
+            )
+        else:
+            question["_form_safe"] = question["type"] in _FORM_WIDGET_TYPES
+    return tuple(question_list)
+
+
+questions = _prepare_questions(questions)
+
+QUESTION_INDEX = _build_question_index(questions)
+
+# Template IDs of repeated questions by their prefix, e.g. "system_purpose_"
+_TEMPLATE_PREFIXES = {
+    question_id[: -len("{item}")]: question_id
+    for question_id in QUESTION_INDEX
+    if question_id.endswith("{item}")
+}
+
+# Splits a concrete repeated question ID into its template prefix and item
+_TEMPLATE_ID_RE = re.compile(
+    "^("
+    + "|".join(
+        re.escape(prefix)
+        for prefix in sorted(_TEMPLATE_PREFIXES, key=len, reverse=True)
+    )
+    + ")(.+)$"
+)
+
+
+def split_question_id(question_id):
+    """
+    Split a concrete question ID into its template ID and item.
+
+    Args:
+        question_id (str): A question ID such as "system_purpose_IT Server 1"
+
+    Returns:
+        tuple: (template_id, item), or (question_id, None) if it isn't repeated
+    """
+    match = _TEMPLATE_ID_RE.match(question_id)
+    if match is None:
+        return question_id, None
+    return _TEMPLATE_PREFIXES[match.group(1)], match.group(2)
+
+
 def get_question_by_id(question_id):
     """
     Find a question by its ID in the questions list.
@@ -257,21 +369,294 @@ def get_question_by_id(question_id):
     Returns:
         dict or None: The question with the matching ID, or None if not found
     """
-    for question in questions:
-        if question["id"] == question_id:
-            return question
+    question = QUESTION_INDEX.get(question_id)
+    if question is None:
+        # For repeated sections, the ID contains the item instead of {item}
+        template_id, item = split_question_id(question_id)
+        if item is not None:
+            question = QUESTION_INDEX.get(template_id)
+    return question
+
+
+def _freeze(value):
+    """
+    Turn a value into a hashable one so it can be used as a cache key.
+
+    Lists become tuples and dicts sorted tuples of their items, nested values
+    included, since imported session files may contain either.
+
+    Args:
+        value: The answer or condition value
+
+    Returns:
+        The hashable equivalent of the value
+    """
+    if isinstance(value, list):
+        return tuple(_freeze(element) for element in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(element)) for key, element in value.items()))
+    return value
+
+
+# Condition operators, called as operator(answer, value) on frozen values
+CONDITION_OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "in": lambda answer, value: answer in value if isinstance(value, tuple) else False,
+    "contains": lambda answer, value: (
+        value in answer if isinstance(answer, tuple) else answer == value
+    ),
+}
+
+
+@functools.lru_cache(maxsize=4096)
+def _evaluate_condition(operator_name, value, answer):
+    """
+    Evaluate a condition operator against an answer
+
+    Args:
+        operator_name (str): The condition operator
+        value: The (frozen) value from the condition
+        answer: The (frozen) answer to compare against
+
+    Returns:
+        bool: True if the condition holds (or the operator is unknown), False otherwise
+    """
+    evaluate = CONDITION_OPERATORS.get(operator_name)
+    return evaluate(answer, value) if evaluate else True
+
+
+def _bind_conditions(question_list):
+    """
+    Attach a "_cond_fn" to each question with a condition.
+
+    The function has the condition's operator and frozen value bound and only
+    takes the frozen answer.
+
+    Args:
+        question_list (tuple): The questionnaire structure
+    """
+    for question in question_list:
+        condition = question.get("condition")
+        if condition is not None:
+            question["_cond_fn"] = functools.partial(
+                _evaluate_condition, condition["operator"], _freeze(condition["value"])
+            )
+        if "questions" in question:
+            _bind_conditions(question["questions"])
+
+
+_bind_conditions(questions)
+
+
+@functools.lru_cache(maxsize=4096)
+def _resolve_item(template, item):
+    """Cached placeholder replacement behind resolve_item, item is a str"""
+    return template.replace("{item}", item)
+
+
+def resolve_item(template, item):
+    """
+    Replace the {item} placeholder of a repeated question template.
+
+    Args:
+        template (str): Question ID, text or condition ID containing {item}
+        item: The item the question is repeated for, list entries from an
+            imported session may not be strings
+
+    Returns:
+        str: The template with the placeholder replaced
+    """
+    return _resolve_item(template, str(item))
 
-        # Check for nested questions in sections
-        if question["type"] == "repeated_section" and "questions" in question:
-            for nested_question in question["questions"]:
-                # For repeated sections, the ID may contain {item} placeholder
-                if (
-                    nested_question["id"] == question_id
-                    or nested_question["id"].split("_{")[0] == question_id.split("_")[0]
-                ):
-                    return nested_question
 
-    return None
+def should_show_question(question, answers, item=None):
+    """
+    Determine if a question should be shown based on its conditions
+
+    Args:
+        question (dict): The question to check
+        answers (dict): The current answers
+        item (str, optional): The item for a repeated question, used to resolve
+            an {item} placeholder in the condition
+
+    Returns:
+        bool: True if the question should be shown, False otherwise
+    """
+    if "condition" not in question:
+        return True
+
+    condition = question["condition"]
+    q_id = condition["question_id"]
+    if item is not None and question["_condition_has_item"]:
+        q_id = resolve_item(q_id, item)
+
+    if q_id not in answers:
+        return False
+
+    return question["_cond_fn"](_freeze(answers[q_id]))
+
+
+def _build_condition_graph(question_list):
+    """
+    Build the dependency graph of questions with a condition.
+
+    Conditions of repeated questions refer to {item} templates and are evaluated
+    per item instead.
+
+    Args:
+        question_list (list): The questionnaire structure
+
+    Returns:
+        tuple: (conditional, dependents) where conditional maps the conditional
+            question IDs to their questions in topological order and dependents maps
+            a question ID to the IDs of the conditional questions reading its answer
+    """
+    by_id = {}
+    for question in question_list:
+        nested = question.get("questions", []) if question["type"] == "section" else []
+        for candidate in (question, *nested):
+            condition = candidate.get("condition")
+            if condition and "{item}" not in condition["question_id"]:
+                by_id[candidate["id"]] = candidate
+
+    dependents = {}
+    for question_id, question in by_id.items():
+        source_id = question["condition"]["question_id"]
+        dependents.setdefault(source_id, []).append(question_id)
+
+    # Order the questions so each one comes after the question its condition reads
+    ordered = {}
+    visiting = set()
+
+    def visit(question_id):
+        if question_id in ordered:
+            return
+        if question_id in visiting:
+            raise ValueError(f"Circular condition on question {question_id}")
+        visiting.add(question_id)
+        source_id = by_id[question_id]["condition"]["question_id"]
+        if source_id in by_id:
+            visit(source_id)
+        ordered[question_id] = by_id[question_id]
+
+    for question_id in by_id:
+        visit(question_id)
+
+    return ordered, dependents
+
+
+CONDITIONAL_QUESTIONS, CONDITION_DEPENDENTS = _build_condition_graph(questions)
+
+
+def _is_hidden(question, answers, hidden):
+    """Check whether a conditional question is hidden, given the hidden set so far"""
+    source_id = question["condition"]["question_id"]
+    return source_id in hidden or not should_show_question(question, answers)
+
+
+def compute_hidden_questions(answers):
+    """
+    Determine all conditional questions that are hidden for the given answers.
+
+    A question is hidden if its condition fails or the question it depends on is
+    hidden itself.
+
+    Args:
+        answers (dict): The current answers
+
+    Returns:
+        set: IDs of the hidden questions
+    """
+    hidden = set()
+    for question_id, question in CONDITIONAL_QUESTIONS.items():
+        if _is_hidden(question, answers, hidden):
+            hidden.add(question_id)
+    return hidden
+
+
+def update_hidden_questions(hidden, answers, changed_ids):
+    """
+    Re-evaluate only the questions that depend on the changed answers.
+
+    Args:
+        hidden (set): IDs of the hidden questions, updated in place
+        answers (dict): The current answers
+        changed_ids (iterable): IDs of the answers that changed
+    """
+    pending = [
+        dependent_id
+        for changed_id in changed_ids
+        for dependent_id in CONDITION_DEPENDENTS.get(changed_id, ())
+    ]
+    while pending:
+        question_id = pending.pop()
+        is_hidden = _is_hidden(CONDITIONAL_QUESTIONS[question_id], answers, hidden)
+        if is_hidden == (question_id in hidden):
+            continue
+
+        if is_hidden:
+            hidden.add(question_id)
+        else:
+            hidden.discard(question_id)
+        # A change in visibility propagates to the questions depending on this one
+        pending.extend(CONDITION_DEPENDENTS.get(question_id, ()))
+
+
+def freeze_answers(answers):
+    """
+    Convert the answers into a hashable, order-independent snapshot.
+
+    Args:
+        answers (dict): The current answers
+
+    Returns:
+        tuple: Sorted (question_id, answer) pairs with lists turned into tuples
+    """
+    # Only the top level is converted, so thaw_answers restores the answers
+    return tuple(
+        sorted(
+            (key, tuple(value) if isinstance(value, list) else value)
+            for key, value in answers.items()
+        )
+    )
+
+
+def thaw_answers(answers_frozen):
+    """
+    Turn a snapshot from freeze_answers back into an answers dict.
+
+    Args:
+        answers_frozen (tuple): Snapshot returned by freeze_answers
+
+    Returns:
+        dict: The answers with tuples turned back into lists
+    """
+    return {
+        key: list(value) if isinstance(value, tuple) else value
+        for key, value in answers_frozen
+    }
+
+
+# Answers read by collect_all_responsible_parties and collect_all_processors
+_PARTY_ANSWER_PREFIXES = ("system_responsible_", "processors_")
+_PARTY_ANSWER_IDS = frozenset({"has_additional_responsible", "additional_responsible"})
+
+
+def affects_party_lists(question_id):
+    """
+    Tell whether an answer feeds the collected responsible parties or processors.
+
+    Args:
+        question_id (str): The ID of the answered question
+
+    Returns:
+        bool: True if changing the answer can change either collected list
+    """
+    return (
+        question_id.startswith(_PARTY_ANSWER_PREFIXES)
+        or question_id in _PARTY_ANSWER_IDS
+    )
 
 
 def collect_all_responsible_parties(answers):
@@ -284,12 +669,13 @@ def collect_all_responsible_parties(answers):
     Returns:
         list: List of all responsible parties
     """
-    all_responsible = []
+    # A set accumulator removes duplicates as the parties are collected
+    all_responsible = set()
 
     # Collect from system_responsible_{item} questions
     for key, value in answers.items():
         if key.startswith("system_responsible_") and isinstance(value, list):
-            all_responsible.extend(value)
+            all_responsible.update(value)
 
     # Add from additional_responsible only if has_additional_responsible is True
     if (
@@ -297,10 +683,9 @@ def collect_all_responsible_parties(answers):
         and "additional_responsible" in answers
         and isinstance(answers["additional_responsible"], list)
     ):
-        all_responsible.extend(answers["additional_responsible"])
+        all_responsible.update(answers["additional_responsible"])
 
-    # Remove duplicates and return
-    return sorted(list(set(all_responsible)))
+    return sorted(all_responsible)
 
 
 def collect_all_processors(answers):
@@ -313,12 +698,12 @@ def collect_all_processors(answers):
     Returns:
         list: List of all processors
     """
-    all_processors = []
+    # A set accumulator removes duplicates as the processors are collected
+    all_processors = set()
 
     # Collect processors from each responsible party
     for key, value in answers.items():
         if key.startswith("processors_") and isinstance(value, list):
-            all_processors.extend(value)
+            all_processors.update(value)
 
-    # Remove duplicates and return
-    return sorted(list(set(all_processors)))
+    return sorted(all_processors)
@@ -3,10 +3,15 @@ Session management module for the Data Flow Assessment tool.
 Handles exporting and importing user sessions via client-side storage.
 """
 
-import json
+import re
+import orjson
 import streamlit as st
 from datetime import datetime
 from translations import get_text, get_formatted_text
+from questions import compute_hidden_questions
+
+# Characters that are replaced by "_" in file names, umlauts are kept as letters
+_UNSAFE_FILENAME_CHAR_RE = re.compile(r"\W")
 
 
 class SessionManager:
@@ -15,16 +20,27 @@ class SessionManager:
     Handles export and import of user sessions via client-side downloads/uploads.
     """
 
-    def __init__(self):
-        """Initialize the session manager."""
-        self._initialize_session_state()
+    def initialize_session_state(self):
+        """
+        Initialize session state variables if they don't exist.
 
-    def _initialize_session_state(self):
-        """Initialize session state variables if they don't exist"""
+        The manager itself is shared across sessions, so this has to run for
+        every session rather than once in the constructor.
+        """
         if "answers" not in st.session_state:
             st.session_state.answers = {}
         if "current_question_index" not in st.session_state:
             st.session_state.current_question_index = 0
+        if "answers_version" not in st.session_state:
+            st.session_state.answers_version = 0
+        if "party_lists_version" not in st.session_state:
+            st.session_state.party_lists_version = 0
+        if "editor_versions" not in st.session_state:
+            st.session_state.editor_versions = {}
+        if "hidden_questions" not in st.session_state:
+            st.session_state.hidden_questions = compute_hidden_questions(
+                st.session_state.answers
+            )
         if "completed" not in st.session_state:
             st.session_state.completed = False
         if "language" not in st.session_state:
@@ -38,8 +54,21 @@ class SessionManager:
             name (str, optional): Name for the session file
 
         Returns:
-            tuple: (file_name, json_content) for download
+            tuple: (file_name, json_content) for download, the content as UTF-8 bytes
         """
+        # The sidebar re-exports on every rerun; reuse the last export while
+        # nothing that ends up in the file has changed
+        cache_key = (
+            name,
+            st.session_state.answers_version,
+            st.session_state.current_question_index,
+            st.session_state.completed,
+            st.session_state.language,
+        )
+        cached = st.session_state.get("export_cache")
+        if cached is not None and cached[0] == cache_key:
+            return cached[1]
+
         # Generate a name based on system name if available, otherwise use timestamp
         if name is None:
             system_name = ""
@@ -55,7 +84,7 @@ class SessionManager:
 
             if system_name:
                 # Create a filename-safe version of the system name
-                safe_name = "".join(c if c.isalnum() else "_" for c in system_name)
+                safe_name = _UNSAFE_FILENAME_CHAR_RE.sub("_", system_name)
                 name = f"{safe_name}_{timestamp}.json"
             else:
                 name = f"datenfluss_{timestamp}.json"
@@ -79,8 +108,10 @@ class SessionManager:
             "timestamp": datetime.now().isoformat(),
         }
 
-        # Convert to JSON string
-        json_content = json.dumps(data, indent=2, ensure_ascii=False)
+        # Convert to UTF-8 encoded JSON
+        json_content = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+
+        st.session_state.export_cache = (cache_key, (name, json_content))
 
         return name, json_content
 
@@ -95,12 +126,20 @@ class SessionManager:
             bool: True if import was successful, False otherwise
         """
         try:
-            # Read uploaded file content
-            content = uploaded_file.getvalue().decode("utf-8")
-            data = json.loads(content)
+            # Parse the uploaded bytes directly, orjson validates the UTF-8
+            data = orjson.loads(uploaded_file.getvalue())
 
             # Update session state
             st.session_state.answers = data.get("answers", {})
+            st.session_state.answers_version = (
+                st.session_state.get("answers_version", 0) + 1
+            )
+            st.session_state.party_lists_version = (
+                st.session_state.get("party_lists_version", 0) + 1
+            )
+            st.session_state.hidden_questions = compute_hidden_questions(
+                st.session_state.answers
+            )
             st.session_state.current_question_index = data.get(
                 "current_question_index", 0
             )
@@ -111,7 +150,7 @@ class SessionManager:
                 st.session_state.language = data["language"]
 
             return True
-        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        except orjson.JSONDecodeError as e:
             language = st.session_state.get("language", "de")
             st.error(get_formatted_text("import_error", language, error=str(e)))
             return False
@@ -128,7 +167,7 @@ class SessionManager:
                 del st.session_state[key]
 
         # Reinitialize session state
-        self._initialize_session_state()
+        self.initialize_session_state()
 
         # Restore the language setting
         st.session_state.language = current_language
@@ -3,6 +3,9 @@ Translations module for the Data Flow Assessment tool.
 This module contains all UI strings to support internationalization.
 """
 
+from functools import lru_cache
+from types import SimpleNamespace
+
 # Available languages
 AVAILABLE_LANGUAGES = ["de", "en"]
 DEFAULT_LANGUAGE = "de"
@@ -42,6 +45,7 @@ translations = {
         "section_not_applicable": "Dieser Abschnitt ist basierend auf Ihren vorherigen Antworten nicht anwendbar.",
         "import_error": "Fehler beim Importieren der Sitzung: {error}",
         "no_answers": "Noch keine Antworten vorhanden.",
+        "generate_policy_text": "Datenschutzbestimmung generieren",
         "changes_saved": "Änderungen erfolgreich gespeichert!",
         # Question-specific help texts and labels
         "your_answer": "Ihre Antwort:",
@@ -50,6 +54,7 @@ translations = {
         "add_new_item": "Neuen Eintrag hinzufügen:",
         "add_button": "Hinzufügen",
         "current_entries": "Aktuelle Einträge:",
+        "entry_column": "Eintrag",
         "edit_question_number": "Fragennummer zum Bearbeiten:",
         "save_changes": "Änderungen speichern",
         "answer_first": "Bitte beantworten Sie zuerst die Frage zu {field}.",
@@ -136,6 +141,7 @@ translations = {
         "section_not_applicable": "This section is not applicable based on your previous answers.",
         "import_error": "Error importing session: {error}",
         "no_answers": "No answers available yet.",
+        "generate_policy_text": "Generate privacy policy",
         "changes_saved": "Changes saved successfully!",
         # Question-specific help texts and labels
         "your_answer": "Your answer:",
@@ -144,6 +150,7 @@ translations = {
         "add_new_item": "Add new entry:",
         "add_button": "Add",
         "current_entries": "Current entries:",
+        "entry_column": "Entry",
         "edit_question_number": "Question number to edit:",
         "save_changes": "Save Changes",
         "answer_first": "Please answer the question about {field} first.",
@@ -217,6 +224,33 @@ def get_text(key, language=DEFAULT_LANGUAGE):
     return translations[language].get(key, key)
 
 
+class _TextBundle(SimpleNamespace):
+    """Translations as attributes, unknown keys resolve to the key like get_text"""
+
+    def __getattr__(self, key):
+        if key.startswith("__"):
+            raise AttributeError(key)
+        return key
+
+
+@lru_cache(maxsize=None)
+def get_text_bundle(language=DEFAULT_LANGUAGE):
+    """
+    Get all translated strings of a language as attributes.
+
+    Every attribute holds what get_text returns for the key and language, so
+    missing translations and unknown keys fall back the same way.
+
+    Args:
+        language (str, optional): The language code. Defaults to DEFAULT_LANGUAGE.
+
+    Returns:
+        SimpleNamespace: One attribute per translation key
+    """
+    keys = set().union(*translations.values())
+    return _TextBundle(**{key: get_text(key, language) for key in keys})
+
+
 def get_formatted_text(key, language=DEFAULT_LANGUAGE, **kwargs):
     """
     Get a translated string and format it with the provided keyword arguments.
@@ -6,9 +6,116 @@ Placeholder for future implementation of data flow diagrams.
 import streamlit as st
 from pathlib import Path
 import os
+from questions import freeze_answers, thaw_answers
 from translations import get_text
 
 
+# Answers the d2 script is built from
+_D2_ANSWER_KEYS = ("systems", "additional_responsible", "data_types")
+_D2_ANSWER_PREFIXES = (
+    "system_purpose_",
+    "system_responsible_",
+    "processors_",
+    "data_categories_",
+)
+
+
+def _d2_answers_key(answers):
+    """
+    Collect the answers used by the d2 script as a hashable key.
+
+    Args:
+        answers (dict): Questionnaire answers
+
+    Returns:
+        tuple: Frozen snapshot of the relevant answers
+    """
+    return freeze_answers(
+        {
+            key: value
+            for key, value in answers.items()
+            if key in _D2_ANSWER_KEYS or key.startswith(_D2_ANSWER_PREFIXES)
+        }
+    )
+
+
+@st.cache_data(show_spinner=False)
+def _build_d2_script(answers_key, language):
+    """
+    Build the d2lang script, cached on the relevant answers and the language.
+
+    Args:
+        answers_key (tuple): Snapshot returned by _d2_answers_key
+        language (str): Language for the diagram labels
+
+    Returns:
+        str: d2lang script content
+    """
+    answers = thaw_answers(answers_key)
+
+    # Extract relevant data
+    systems = answers.get("systems", [])
+
+    # Start building the d2 script
+    d2_script = "# Data Flow Diagram\n\n"
+
+    # Add systems as nodes
+    d2_script += "# Systems\n"
+    for system in systems:
+        purpose = answers.get(f"system_purpose_{system}", "")
+        d2_script += f"{system}: {system}\\n({purpose}) {{shape: rectangle}}\n"
+
+    # Add responsible parties and processors
+    responsible_parties = []
+    for system in systems:
+        system_responsible = answers.get(f"system_responsible_{system}", [])
+        for party in system_responsible:
+            if party not in responsible_parties:
+                responsible_parties.append(party)
+
+    if "additional_responsible" in answers:
+        for party in answers["additional_responsible"]:
+            if party not in responsible_parties:
+                responsible_parties.append(party)
+
+    # Labels based on language
+    processor_label = get_text("processor", language)
+
+    d2_script += "\n# Responsible Parties and Processors\n"
+    for party in responsible_parties:
+        processors = answers.get(f"processors_{party}", [])
+        processors_str = ", ".join(processors)
+        d2_script += f"{party}: {party}\\n({processor_label}s: {processors_str}) {{shape: oval}}\n"
+
+    # Add data types
+    data_types = answers.get("data_types", [])
+    d2_script += "\n# Data Types\n"
+    d2_script += "data: Data {\n"
+    for data_type in data_types:
+        categories = answers.get(f"data_categories_{data_type}", [])
+        categories_str = ", ".join(
+            categories[:2]
+        )  # Limit to first 2 categories for readability
+        if len(categories) > 2:
+            categories_str += "..."
+
+        d2_script += (
+            f"  {data_type}: {data_type}\\n({categories_str}) {{shape: document}}\n"
+        )
+    d2_script += "}\n"
+
+    # Add some connections
+    d2_script += "\n# Connections (Placeholder)\n"
+
+    # Simple connection from systems to responsible parties
+    for system in systems:
+        responsible_parties = answers.get(f"system_responsible_{system}", [])
+        for party in responsible_parties:
+            d2_script += f"{system} -> {party}\n"
+
+    return d2_script
+
+
 class DataFlowVisualizer:
     """
     Placeholder class for generating data flow visualizations.
@@ -36,67 +143,7 @@ class DataFlowVisualizer:
         """
         language = st.session_state.get("language", "de")
 
-        # Extract relevant data
-        systems = answers.get("systems", [])
-
-        # Start building the d2 script
-        d2_script = "# Data Flow Diagram\n\n"
-
-        # Add systems as nodes
-        d2_script += "# Systems\n"
-        for system in systems:
-            purpose = answers.get(f"system_purpose_{system}", "")
-            d2_script += f"{system}: {system}\\n({purpose}) {{shape: rectangle}}\n"
-
-        # Add responsible parties and processors
-        responsible_parties = []
-        for system in systems:
-            system_responsible = answers.get(f"system_responsible_{system}", [])
-            for party in system_responsible:
-                if party not in responsible_parties:
-                    responsible_parties.append(party)
-
-        if "additional_responsible" in answers:
-            for party in answers["additional_responsible"]:
-                if party not in responsible_parties:
-                    responsible_parties.append(party)
-
-        # Labels based on language
-        processor_label = get_text("processor", language)
-
-        d2_script += "\n# Responsible Parties and Processors\n"
-        for party in responsible_parties:
-            processors = answers.get(f"processors_{party}", [])
-            processors_str = ", ".join(processors)
-            d2_script += f"{party}: {party}\\n({processor_label}s: {processors_str}) {{shape: oval}}\n"
-
-        # Add data types
-        data_types = answers.get("data_types", [])
-        d2_script += "\n# Data Types\n"
-        d2_script += "data: Data {\n"
-        for data_type in data_types:
-            categories = answers.get(f"data_categories_{data_type}", [])
-            categories_str = ", ".join(
-                categories[:2]
-            )  # Limit to first 2 categories for readability
-            if len(categories) > 2:
-                categories_str += "..."
-
-            d2_script += (
-                f"  {data_type}: {data_type}\\n({categories_str}) {{shape: document}}\n"
-            )
-        d2_script += "}\n"
-
-        # Add some connections
-        d2_script += "\n# Connections (Placeholder)\n"
-
-        # Simple connection from systems to responsible parties
-        for system in systems:
-            responsible_parties = answers.get(f"system_responsible_{system}", [])
-            for party in responsible_parties:
-                d2_script += f"{system} -> {party}\n"
-
-        return d2_script
+        return _build_d2_script(_d2_answers_key(answers), language)
 
     def render_visualization(self, answers, output_format="svg"):
         """